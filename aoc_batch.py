@@ -0,0 +1,209 @@
+"""
+Command-line batch runner for a declarative analysis spec.
+
+    python aoc_batch.py spec.json [--out-dir DIR] [--n-jobs N] [--dry-run]
+
+The spec (JSON) describes one pipeline, feature file -> outlier filter -> fits ->
+contrasts -> export; every section except "data" is optional:
+
+    {
+      "data": {"source": "AOC_alpha_gaze.csv", "base_dir": "/project",
+               "columns": ["Trial"], "categorical": ["ID", "Condition"]},
+      "outliers": {"variables": ["AlphaPower", "GazeDev"], "by": ["ID", "Condition"]},
+      "fits": [
+        {"formula": "AlphaPower ~ Gaze_c * C(Condition)", "group": "ID",
+         "solver": "fast", "label": "full", "task": "sternberg"},
+        {"dvs": ["Alpha", "Beta", "Theta"], "rhs": "C(Condition)", "group": "ID"}
+      ],
+      "contrasts": [{"value_col": "AlphaPower", "group_col": "Condition", "id_col": "ID"}],
+      "export": {"fixed_effects": "fixed_effects.csv", "contrasts": "contrasts.csv",
+                 "tables": "models.docx", "data": "filtered.parquet"}
+    }
+
+"source" is a feature-file name (resolved under base_dir like
+aoc_feature_files.feature_file, or through a FeatureStore with "store": true) or a
+path; only the columns the spec uses are loaded. A fit with "dvs" and "rhs" runs
+mixedlm_helpers.fit_mixedlm_multi; other fit keys (reml, method, maxiter, fallback,
+timeout) are passed to fit_mixedlm. Relative export paths are resolved against
+--out-dir (default: the spec's directory).
+
+Heavy dependencies (statsmodels, scipy.stats, patsy, python-docx) are only imported
+by the steps that use them, so short jobs such as outlier filtering start fast
+(see benchmarks/check_imports.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+
+_FIT_KEYS = ("reml", "method", "maxiter", "solver", "fallback", "timeout")
+
+
+def load_spec(path):
+    with open(path, encoding="utf-8") as fh:
+        spec = json.load(fh)
+    if "data" not in spec or "source" not in spec["data"]:
+        raise ValueError(f"{path}: the spec needs data.source")
+    return spec
+
+
+def spec_columns(spec):
+    """
+    (formulas, columns) the spec reads: the formula text of all fits (its variables
+    are picked out against the file header) and the plain column names.
+    """
+    cols = list(spec["data"].get("columns", []))
+    out = spec.get("outliers")
+    if out:
+        cols += list(out["variables"]) + ([out["by"]] if isinstance(out["by"], str) else list(out["by"]))
+    formulas = []
+    for fit in spec.get("fits", []):
+        if "dvs" in fit:
+            cols += list(fit["dvs"])
+            formulas.append(fit["rhs"])
+        else:
+            formulas.append(fit["formula"])
+        cols.append(fit["group"])
+    for c in spec.get("contrasts", []):
+        cols += [c["value_col"], c.get("group_col", "Condition"), c.get("id_col", "ID")]
+    return " + ".join(formulas) or None, list(dict.fromkeys(cols))
+
+
+def load_data(spec):
+    from aoc_feature_files import FeatureStore, load_model_frame
+
+    d = spec["data"]
+    base_dir = d.get("base_dir")
+    store = FeatureStore(base_dir) if d.get("store") and base_dir else None
+    formulas, cols = spec_columns(spec)
+    return load_model_frame(d["source"], formula=formulas, columns=cols, base_dir=base_dir, store=store,
+                            categorical=tuple(d.get("categorical", ("ID", "Condition"))),
+                            float32=bool(d.get("float32", False)))
+
+
+def run_fits(df, fits, n_jobs=1, log=print):
+    """Fitted models ([(title, result)]) and their stacked fixed-effects table."""
+    import pandas as pd
+    from design_cache import DesignCache
+    from mixedlm_helpers import fit_mixedlm, fit_mixedlm_multi, mixedlm_fixed_effects_to_df
+
+    # fits of one spec share design matrices; every fit still uses the complete cases
+    # of its own variables, so results do not depend on the order of the fits
+    design = DesignCache()
+    models, tables = [], []
+    for i, fit in enumerate(fits):
+        t0 = time.perf_counter()
+        label, task = fit.get("label"), fit.get("task")
+        if "dvs" in fit:
+            kw = {k: fit[k] for k in ("reml", "method", "maxiter", "solver") if k in fit}
+            tbl, summaries = fit_mixedlm_multi(fit["dvs"], fit["rhs"], df, fit["group"], n_jobs=n_jobs,
+                                               task=task, model_label=label, summaries=True,
+                                               design=design, **kw)
+            models += [(f"{dv} ~ {fit['rhs']}", s) for dv, s in zip(fit["dvs"], summaries) if s is not None]
+            tables.append(tbl)
+            what = f"{len(fit['dvs'])} DVs ~ {fit['rhs']}"
+        else:
+            kw = {k: fit[k] for k in _FIT_KEYS if k in fit}
+            res = fit_mixedlm(fit["formula"], df, fit["group"], design=design, **kw)
+            tables.append(mixedlm_fixed_effects_to_df(res, task, fit.get("dv", fit["formula"].split("~")[0].strip()),
+                                                      label))
+            models.append((fit["formula"], res))
+            what = fit["formula"]
+        log(f"fit {i + 1}/{len(fits)}: {what} ({time.perf_counter() - t0:.2f} s)")
+    table = pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+    return models, table
+
+
+def run_contrasts(df, contrasts, log=print):
+    import pandas as pd
+    from stats_helpers import mixedlm_pairwise_contrasts
+
+    out = []
+    for c in contrasts:
+        kw = {k: v for k, v in c.items() if k != "label"}
+        tbl = mixedlm_pairwise_contrasts(df, **kw)
+        tbl.insert(0, "DV", c["value_col"])
+        if "label" in c:
+            tbl.insert(1, "ModelLabel", c["label"])
+        out.append(tbl)
+        log(f"contrasts: {c['value_col']} by {c.get('group_col', 'Condition')}")
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame()
+
+
+def _write_frame(df, path):
+    if path.lower().endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def run(spec, out_dir=".", n_jobs=1, log=print):
+    """Run every step of the spec; returns {"data", "models", "fixed_effects", "contrasts"}."""
+    t0 = time.perf_counter()
+    df = load_data(spec)
+    log(f"loaded {len(df)} rows x {df.shape[1]} columns ({time.perf_counter() - t0:.2f} s)")
+
+    out = spec.get("outliers")
+    if out:
+        from stats_helpers import iqr_outlier_filter
+
+        df = iqr_outlier_filter(df, out["variables"], out["by"], inplace=True)
+        log(f"outliers: {int(df[list(out['variables'])].isna().sum().sum())} values masked")
+
+    models, fixed = run_fits(df, spec.get("fits", []), n_jobs=n_jobs, log=log)
+    contrasts = run_contrasts(df, spec.get("contrasts", []), log=log)
+
+    exp = spec.get("export", {})
+
+    def target(key):
+        path = os.path.join(out_dir, exp[key])
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return path
+
+    if "data" in exp:
+        _write_frame(df, target("data"))
+    if "fixed_effects" in exp and len(fixed):
+        _write_frame(fixed, target("fixed_effects"))
+    if "contrasts" in exp and len(contrasts):
+        _write_frame(contrasts, target("contrasts"))
+    if "tables" in exp and models:
+        from export_model_table import export_model_tables
+
+        export_model_tables([m for _, m in models], target("tables"), titles=[t for t, _ in models])
+    if exp:
+        log(f"exported {', '.join(sorted(exp))} to {os.path.abspath(out_dir)}")
+    log(f"done in {time.perf_counter() - t0:.2f} s")
+    return {"data": df, "models": models, "fixed_effects": fixed, "contrasts": contrasts}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("spec", help="analysis spec (JSON)")
+    ap.add_argument("--out-dir", help="directory for relative export paths (default: the spec's directory)")
+    ap.add_argument("--n-jobs", type=int, default=1, help="worker processes for multi-DV fits")
+    ap.add_argument("--dry-run", action="store_true", help="validate the spec and list the steps")
+    ap.add_argument("--quiet", action="store_true")
+    args = ap.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    log = (lambda *a, **k: None) if args.quiet else (lambda msg: print(msg, flush=True))
+    if args.dry_run:
+        steps = ["load " + spec["data"]["source"]]
+        if spec.get("outliers"):
+            steps.append("outliers " + ", ".join(spec["outliers"]["variables"]))
+        steps += [f"fit {f.get('formula') or ', '.join(f['dvs']) + ' ~ ' + f['rhs']}" for f in spec.get("fits", [])]
+        steps += [f"contrasts {c['value_col']}" for c in spec.get("contrasts", [])]
+        steps += [f"export {k} -> {v}" for k, v in spec.get("export", {}).items()]
+        print("\n".join(steps))
+        return 0
+    out_dir = args.out_dir or os.path.dirname(os.path.abspath(args.spec))
+    run(spec, out_dir=out_dir, n_jobs=args.n_jobs, log=log)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import os
 
+from formula_utils import formula_columns
+
 
 def feature_file(base_dir: str, filename: str) -> str:
     """Return an existing feature-file path with backwards-compatible naming."""
@@ -29,3 +33,216 @@ def feature_file(base_dir: str, filename: str) -> str:
     raise FileNotFoundError(
         f"Could not find feature file '{filename}'. Checked: {candidates}"
     )
+
+
+class FeatureStore:
+    """
+    Feature-file resolution and loading with an index and a columnar cache.
+
+    The contents of data/features are listed once into an index, which is rebuilt
+    whenever the directory's mtime changes (files added, removed or renamed), so
+    `resolve` does not stat candidate paths on every call. Resolution follows the
+    same rules as `feature_file`.
+
+    `load` converts each resolved CSV to Parquet (or Feather) the first time it is
+    read and serves later loads from that file, memory-mapped. Cache files are named
+    after a hash of the source path (relative to base_dir) and the read_csv kwargs,
+    and the source's size and mtime: sources with the same name in different
+    directories, or loaded with different kwargs, get their own cache files, and a
+    changed CSV is converted again and its stale cache file (same path and kwargs)
+    is removed. Without pyarrow, `load` falls back to read_csv.
+    """
+
+    def __init__(self, base_dir: str, cache_dir: str | None = None, cache_format: str = "parquet"):
+        if cache_format not in ("parquet", "feather"):
+            raise ValueError(f"Unknown cache_format: {cache_format}")
+        self.base_dir = base_dir
+        self.feature_dir = os.path.join(base_dir, "data", "features")
+        self.cache_dir = cache_dir or os.path.join(self.feature_dir, ".columnar_cache")
+        self.cache_format = cache_format
+        self._index: dict[str, frozenset] = {}
+        self._mtimes: dict[str, int] = {}
+
+    def _listing(self, directory: str) -> frozenset:
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return frozenset()
+        if self._mtimes.get(directory) != mtime:
+            with os.scandir(directory) as it:
+                self._index[directory] = frozenset(
+                    e.name for e in it if not e.name.startswith(".") and e.is_file()
+                )
+            self._mtimes[directory] = mtime
+        return self._index[directory]
+
+    def _exists(self, path: str) -> bool:
+        directory, name = os.path.split(path)
+        if directory in (self.feature_dir, self.base_dir):
+            return name in self._listing(directory)
+        return os.path.exists(path)
+
+    def resolve(self, filename: str) -> str:
+        """Same result as feature_file(base_dir, filename), served from the index."""
+        candidates = [os.path.join(self.feature_dir, filename)]
+        if filename.startswith("AOC_"):
+            candidates.append(os.path.join(self.feature_dir, filename.removeprefix("AOC_")))
+        else:
+            candidates.append(os.path.join(self.feature_dir, f"AOC_{filename}"))
+        candidates.append(os.path.join(self.base_dir, filename))
+
+        for path in candidates:
+            if self._exists(path):
+                return path
+
+        raise FileNotFoundError(
+            f"Could not find feature file '{filename}'. Checked: {candidates}"
+        )
+
+    def _cache_key(self, src: str, read_csv_kwargs: dict) -> str:
+        """Hash of the source path (relative to base_dir) and the conversion kwargs."""
+        def _default(obj):
+            if isinstance(obj, (set, frozenset)):
+                return sorted(map(repr, obj))
+            return repr(obj)
+
+        rel = os.path.relpath(os.path.abspath(src), os.path.abspath(self.base_dir))
+        text = json.dumps([rel.replace(os.sep, "/"), read_csv_kwargs], sort_keys=True, default=_default)
+        return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+    def _cache_path(self, src: str, key: str) -> str:
+        st = os.stat(src)
+        stem = os.path.splitext(os.path.basename(src))[0]
+        ext = "parquet" if self.cache_format == "parquet" else "feather"
+        return os.path.join(self.cache_dir, f"{stem}.{key}.{st.st_size}.{st.st_mtime_ns}.{ext}")
+
+    def _drop_stale(self, src: str, key: str, keep: str) -> None:
+        prefix = f"{os.path.splitext(os.path.basename(src))[0]}.{key}."
+        ext = os.path.splitext(keep)[1]
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if (name.startswith(prefix) and name.endswith(ext) and path != keep
+                    and name.count(".") == prefix.count(".") + 2):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def load(self, filename: str, columns=None, **read_csv_kwargs):
+        """
+        Load a feature table as a DataFrame, optionally only `columns`.
+        read_csv_kwargs are used when the CSV is (re)converted.
+        """
+        import pandas as pd
+
+        src = self.resolve(filename)
+        if not src.lower().endswith(".csv"):
+            return pd.read_parquet(src, columns=columns)
+        try:
+            import pyarrow.feather as feather
+            import pyarrow.parquet as pq
+        except ImportError:
+            return pd.read_csv(src, usecols=columns, **read_csv_kwargs)
+
+        key = self._cache_key(src, read_csv_kwargs)
+        cache = self._cache_path(src, key)
+        if not os.path.exists(cache):
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df = pd.read_csv(src, **read_csv_kwargs)
+            tmp = f"{cache}.{os.getpid()}.tmp"
+            if self.cache_format == "parquet":
+                df.to_parquet(tmp)               # keeps a non-default index (index_col)
+            else:
+                if not isinstance(df.index, pd.RangeIndex):
+                    df = df.reset_index()       # feather stores no index
+                df.reset_index(drop=True).to_feather(tmp)
+            os.replace(tmp, cache)
+            self._drop_stale(src, key, cache)
+            # fall through: the first load returns the cached frame too, so that its
+            # dtypes and index are the same as on every later load
+
+        if self.cache_format == "parquet":
+            table = pq.read_table(cache, columns=columns, memory_map=True, use_pandas_metadata=True)
+        else:
+            table = feather.read_table(cache, columns=columns, memory_map=True)
+        return table.to_pandas()
+
+
+def _read_header(path: str) -> list:
+    import pandas as pd
+
+    if path.lower().endswith(".csv"):
+        return list(pd.read_csv(path, nrows=0).columns)
+    import pyarrow.parquet as pq
+
+    return list(pq.read_schema(path).names)
+
+
+def load_model_frame(source: str, formula: str | None = None, columns=(), base_dir: str | None = None,
+                     store: FeatureStore | None = None, categorical=("ID", "Condition"),
+                     float32: bool = False, report: bool = False):
+    """
+    Load only the columns a model needs, with compact dtypes.
+
+    source : feature file name (resolved with `store`, or `feature_file` when base_dir
+             is given) or a path to a CSV/Parquet file
+    formula : patsy formula whose variables are loaded (see formula_utils.formula_columns)
+    columns : additional columns to load (e.g. the grouping column)
+    categorical : columns read straight into pandas categoricals (sorted categories,
+                  the level order patsy and stats_helpers._mixedlm_fit use)
+    float32 : store floating-point measurement columns as float32
+    report : also return a dict with the loaded and the estimated full-load size
+
+    Returns the DataFrame, or (DataFrame, report) when report=True.
+    """
+    import pandas as pd
+
+    if store is not None:
+        path = store.resolve(source)
+    elif base_dir is not None:
+        path = feature_file(base_dir, source)
+    else:
+        path = source
+
+    header = _read_header(path)
+    wanted = list(columns)
+    if formula is not None:
+        wanted = formula_columns(formula, header) + wanted
+    missing = [c for c in wanted if c not in header]
+    if missing:
+        raise KeyError(f"Columns {missing} not found in {path}")
+    wanted = list(dict.fromkeys(wanted))
+    cats = [c for c in categorical if c in wanted]
+
+    if path.lower().endswith(".csv") and store is None:
+        # not dtype="category": read_csv would give string categories in lexical
+        # order ("10" < "2") instead of the sorted values of the parsed column
+        df = pd.read_csv(path, usecols=wanted)
+    else:
+        df = store.load(source, columns=wanted) if store is not None else pd.read_parquet(path, columns=wanted)
+    for c in cats:
+        if not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = pd.Categorical(df[c])
+    df = df[wanted]
+    if float32:
+        for c in df.columns:
+            if df[c].dtype == "float64":
+                df[c] = df[c].astype("float32")
+
+    if not report:
+        return df
+    # full-load footprint estimated from a sample of all columns read with default
+    # dtypes (for Parquet only the first batch is read)
+    if path.lower().endswith(".csv"):
+        sample = pd.read_csv(path, nrows=10_000)
+    else:
+        import pyarrow.parquet as pq
+
+        batch = next(pq.ParquetFile(path).iter_batches(batch_size=10_000), None)
+        sample = batch.to_pandas() if batch is not None else pd.DataFrame()
+    per_row = sample.memory_usage(deep=True, index=False).sum() / max(len(sample), 1)
+    loaded = int(df.memory_usage(deep=True, index=False).sum())
+    full = int(per_row * len(df))
+    info = {"path": path, "columns": wanted, "rows": len(df), "bytes_loaded": loaded,
+            "bytes_full_estimate": full, "bytes_saved_estimate": full - loaded}
+    return df, info
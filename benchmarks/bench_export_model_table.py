@@ -0,0 +1,60 @@
+"""
+Export time per model: one .docx per model (export_model_table) vs. all models in
+one document (export_model_tables).
+
+    python benchmarks/bench_export_model_table.py --models 200 --terms 24
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export_model_table import export_model_table, export_model_tables  # noqa: E402
+from mixedlm_helpers import fit_mixedlm  # noqa: E402
+
+
+def _fits(n_models, n_terms, seed=0):
+    rng = np.random.default_rng(seed)
+    n, n_ids = 2000, 30
+    n_levels = max(2, n_terms // 2)
+    df = pd.DataFrame({
+        "ID": rng.integers(0, n_ids, n).astype(str),
+        "Condition": rng.choice([f"L{i}" for i in range(n_levels)], n),
+        "Gaze_c": rng.normal(size=n),
+    })
+    df["AlphaPower"] = rng.normal(size=n_ids)[df["ID"].astype(int)] + rng.normal(size=n)
+    res = fit_mixedlm("AlphaPower ~ Gaze_c * C(Condition)", df, "ID", solver="fast")
+    return [res] * n_models
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--models", type=int, default=100)
+    ap.add_argument("--terms", type=int, default=12)
+    args = ap.parse_args(argv)
+
+    results = _fits(args.models, args.terms)
+    with tempfile.TemporaryDirectory() as tmp:
+        t0 = time.perf_counter()
+        for i, res in enumerate(results):
+            export_model_table(res, os.path.join(tmp, f"model_{i}.docx"))
+        per_file = (time.perf_counter() - t0) / len(results)
+
+        t0 = time.perf_counter()
+        export_model_tables(results, os.path.join(tmp, "all_models.docx"))
+        bulk = (time.perf_counter() - t0) / len(results)
+
+    print(f"models={args.models} fixed-effect rows={len(results[0].params)}")
+    print(f"export_model_table, one file per model : {per_file * 1e3:8.2f} ms/model")
+    print(f"export_model_tables, single document   : {bulk * 1e3:8.2f} ms/model")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Import-time check for the helper modules.
+
+Each module is imported in a fresh interpreter. The check fails if the import
+pulls in a heavy dependency (statsmodels, scipy.stats, scipy.optimize, patsy,
+python-docx, matplotlib), which the modules only import inside the functions that
+use them, or if its best-of-N import time exceeds that of numpy + pandas by more
+than --max-ms. `python aoc_batch.py --help` is timed the same way.
+
+    python benchmarks/check_imports.py
+    python benchmarks/check_imports.py --max-ms 50 --repeat 7
+
+Exit status 1 on any violation.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+MODULES = [
+    "aoc_batch",
+    "aoc_feature_files",
+    "contrasts",
+    "design_cache",
+    "export_model_table",
+    "fit_cache",
+    "fit_summary",
+    "formula_utils",
+    "instrumentation",
+    "lmm_solver",
+    "mixedlm_helpers",
+    "stats_helpers",
+    "streaming_outliers",
+]
+HEAVY = ("statsmodels", "scipy.stats", "scipy.optimize", "patsy", "docx", "matplotlib")
+
+_PROBE = """\
+import sys, time
+t0 = time.perf_counter()
+import numpy, pandas
+t1 = time.perf_counter()
+{stmt}
+t2 = time.perf_counter()
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print(t1 - t0, t2 - t1, ",".join(heavy), sep="|")
+"""
+
+
+def probe(stmt):
+    """(numpy + pandas seconds, extra seconds for stmt, heavy modules loaded)."""
+    code = _PROBE.format(stmt=stmt, heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    base, extra, heavy = out.stdout.strip().split("|")
+    return float(base), float(extra), [h for h in heavy.split(",") if h]
+
+
+def time_cli(repeat):
+    """Best-of-N wall time of `python aoc_batch.py --help` and of `python -c 'import numpy, pandas'`."""
+    def best(cmd):
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            subprocess.run(cmd, cwd=ROOT, capture_output=True, check=True)
+            times.append(time.perf_counter() - t0)
+        return min(times)
+
+    return (best([sys.executable, "aoc_batch.py", "--help"]),
+            best([sys.executable, "-c", "import numpy, pandas"]))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--max-ms", type=float, default=100.0,
+                    help="allowed import time over numpy + pandas (default 100 ms)")
+    ap.add_argument("--repeat", type=int, default=5, help="fresh interpreters per module (best-of)")
+    ap.add_argument("--only", nargs="+", help="check only these modules")
+    args = ap.parse_args(argv)
+
+    failures = []
+    print(f"{'module':<22}{'numpy+pandas':>14}{'extra':>10}  heavy imports")
+    for mod in args.only or MODULES:
+        runs = [probe(f"import {mod}") for _ in range(args.repeat)]
+        base = min(r[0] for r in runs)
+        extra = min(r[1] for r in runs)
+        heavy = runs[0][2]
+        print(f"{mod:<22}{base * 1e3:>12.0f}ms{extra * 1e3:>8.0f}ms  {', '.join(heavy) or '-'}")
+        if heavy:
+            failures.append(f"{mod}: imports {', '.join(heavy)} at module level")
+        if extra * 1e3 > args.max_ms:
+            failures.append(f"{mod}: {extra * 1e3:.0f} ms over numpy + pandas (limit {args.max_ms:.0f} ms)")
+
+    cli, base = time_cli(args.repeat)
+    print(f"\naoc_batch.py --help: {cli * 1e3:.0f} ms (python + numpy + pandas: {base * 1e3:.0f} ms)")
+    if (cli - base) * 1e3 > args.max_ms:
+        failures.append(f"aoc_batch.py --help: {(cli - base) * 1e3:.0f} ms over numpy + pandas "
+                        f"(limit {args.max_ms:.0f} ms)")
+
+    for f in failures:
+        print("FAIL", f)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+Benchmark suite for the statistics helpers on synthetic AOC-style data.
+
+Times iqr_outlier_filter, fit_mixedlm (statsmodels and fast solver), drop1_lrt
+(chi-square and bootstrap), both pairwise-contrast functions,
+mixedlm_fixed_effects_to_df and export_model_table over scaling grids (rows,
+subjects, condition levels, formula terms). Reports best-of-N wall time,
+throughput (rows/s) and peak traced memory per case, and compares against a
+stored baseline: a case that is slower or uses more memory than the tolerance
+allows, or whose result value changed, is reported and the exit status is 1.
+
+    python benchmarks/run_benchmarks.py --grid quick
+    python benchmarks/run_benchmarks.py --grid full --only fit_mixedlm --out results.json
+    python benchmarks/run_benchmarks.py --grid quick --save-baseline benchmarks/baselines/quick.json
+    python benchmarks/run_benchmarks.py --grid quick --baseline benchmarks/baselines/quick.json
+
+Timings are machine dependent, so baselines are not committed: generate one
+locally with --save-baseline (benchmarks/baselines/ is git-ignored) before making
+changes, then compare against it. The file records the host it was produced on,
+and a mismatch is reported.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+
+from export_model_table import export_model_table  # noqa: E402
+from mixedlm_helpers import (  # noqa: E402
+    drop1_lrt,
+    fit_mixedlm,
+    mixedlm_fixed_effects_to_df,
+    pairwise_condition_contrasts_at_mean_gaze,
+)
+from stats_helpers import iqr_outlier_filter, mixedlm_pairwise_contrasts  # noqa: E402
+from synthetic import make_aoc_data  # noqa: E402
+
+GRIDS = {
+    "quick": {
+        "rows": [10, 100, 400],            # trials per subject × condition
+        "subjects": [10, 40],
+        "levels": [3, 6],
+        "terms": [0, 4],                   # extra covariates in the formula
+        "n_boot": 100,
+    },
+    "full": {
+        "rows": [10, 100, 1000, 4000],
+        "subjects": [10, 40, 160],
+        "levels": [3, 6, 12],
+        "terms": [0, 4, 16],
+        "n_boot": 500,
+    },
+}
+
+
+def _formula(n_cov):
+    extra = "".join(f" + X{k + 1}" for k in range(n_cov))
+    return f"AlphaPower ~ Gaze_c * C(Condition){extra}"
+
+
+def _data(subjects=30, levels=3, trials=50, terms=0):
+    return make_aoc_data(n_subjects=subjects, n_conditions=levels, n_trials=trials,
+                         n_covariates=terms, seed=1)
+
+
+# Each case builder returns (func, n_rows, value): func() is the timed call and
+# value(result) a scalar that should stay stable across code changes.
+
+def case_iqr(trials, subjects, **_):
+    df = _data(subjects=subjects, trials=trials)
+    return (lambda: iqr_outlier_filter(df, ["AlphaPower", "GazeDev"], ["ID", "Condition"]),
+            len(df), lambda out: float(out["AlphaPower"].isna().sum()))
+
+
+def case_fit(trials, subjects, levels, terms, solver, **_):
+    df = _data(subjects=subjects, levels=levels, trials=trials, terms=terms)
+    f = _formula(terms)
+    return (lambda: fit_mixedlm(f, df, "ID", solver=solver), len(df),
+            lambda res: float(np.round(res.llf, 4)))
+
+
+def case_drop1(trials, subjects, method, n_boot, **_):
+    df = _data(subjects=subjects, trials=trials)
+    full = fit_mixedlm("AlphaPower ~ Gaze_c * C(Condition)", df, "ID", method=None)
+    red = fit_mixedlm("AlphaPower ~ Gaze_c + C(Condition)", df, "ID", method=None)
+    return (lambda: drop1_lrt(full, red, method=method, n_boot=n_boot, n_jobs=1, seed=0),
+            len(df), lambda out: float(np.round(out["p"], 6)))
+
+
+def case_contrasts_gaze(trials, levels, **_):
+    df = _data(levels=levels, trials=trials)
+    res = fit_mixedlm(_formula(0), df, "ID", solver="fast")
+    lev = list(df["Condition"].cat.categories)
+    return (lambda: pairwise_condition_contrasts_at_mean_gaze(res, lev), len(df),
+            lambda out: float(np.round(out["Estimate"].abs().sum(), 6)))
+
+
+def case_contrasts_fit(trials, levels, solver, **_):
+    df = _data(levels=levels, trials=trials)
+    return (lambda: mixedlm_pairwise_contrasts(df, value_col="AlphaPower", solver=solver),
+            len(df), lambda out: float(np.round(out["estimate"].abs().sum(), 4)))
+
+
+def case_fe_table(terms, **_):
+    df = _data(trials=20, terms=terms)
+    res = fit_mixedlm(_formula(terms), df, "ID", solver="fast")
+    return (lambda: mixedlm_fixed_effects_to_df(res, "task", "AlphaPower", "m"), len(df),
+            lambda out: float(len(out)))
+
+
+def case_export(terms, tmpdir, **_):
+    df = _data(trials=20, terms=terms)
+    res = fit_mixedlm(_formula(terms), df, "ID", solver="fast")
+    path = os.path.join(tmpdir, "model.docx")
+    return (lambda: export_model_table(res, path), len(df), lambda out: float(len(res.params)))
+
+
+def cases(grid):
+    """(benchmark name, parameters, builder) for every point of the grid."""
+    g = GRIDS[grid]
+    out = []
+    for t in g["rows"]:
+        out.append(("iqr_outlier_filter", {"trials": t, "subjects": 30}, case_iqr))
+    for s in g["subjects"]:
+        out.append(("iqr_outlier_filter", {"trials": 50, "subjects": s}, case_iqr))
+    for solver in ("statsmodels", "fast"):
+        for t in g["rows"]:
+            out.append(("fit_mixedlm", {"solver": solver, "trials": t, "subjects": 30, "levels": 3, "terms": 0}, case_fit))
+        for lv in g["levels"]:
+            out.append(("fit_mixedlm", {"solver": solver, "trials": 50, "subjects": 30, "levels": lv, "terms": 0}, case_fit))
+        for k in g["terms"]:
+            out.append(("fit_mixedlm", {"solver": solver, "trials": 50, "subjects": 30, "levels": 3, "terms": k}, case_fit))
+    for t in g["rows"][:2]:
+        out.append(("drop1_lrt", {"method": "chi2", "trials": t, "subjects": 30, "n_boot": 0}, case_drop1))
+        out.append(("drop1_lrt", {"method": "bootstrap", "trials": t, "subjects": 30, "n_boot": g["n_boot"]}, case_drop1))
+    for lv in g["levels"]:
+        out.append(("pairwise_condition_contrasts_at_mean_gaze", {"trials": 50, "levels": lv}, case_contrasts_gaze))
+        for solver in ("statsmodels", "fast"):
+            out.append(("mixedlm_pairwise_contrasts", {"solver": solver, "trials": 50, "levels": lv}, case_contrasts_fit))
+    for k in g["terms"]:
+        out.append(("mixedlm_fixed_effects_to_df", {"terms": k}, case_fe_table))
+        out.append(("export_model_table", {"terms": k}, case_export))
+    # grids along different axes share their centre point
+    unique = {}
+    for c in out:
+        unique.setdefault(case_id(c[0], c[1]), c)
+    return list(unique.values())
+
+
+def case_id(name, params):
+    return name + "[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]"
+
+
+def run_case(builder, params, repeat, tmpdir):
+    func, n_rows, value = builder(tmpdir=tmpdir, **params)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - t0)
+    # separate run for memory: tracemalloc slows allocation-heavy code down
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    seconds = min(times)
+    return {"seconds": seconds, "rows": n_rows, "rows_per_s": n_rows / seconds,
+            "peak_mem_bytes": peak, "value": value(result)}
+
+
+def compare(results, baseline, time_tol, mem_tol, min_ms=2.0):
+    """Return a list of (case, message) regressions against the baseline."""
+    bad = []
+    for cid, r in results.items():
+        b = baseline["results"].get(cid)
+        if b is None:
+            continue
+        # slowdowns below min_ms are scheduler noise on millisecond cases
+        if r["seconds"] > b["seconds"] * (1.0 + time_tol) and r["seconds"] - b["seconds"] > min_ms / 1e3:
+            bad.append((cid, f"time {r['seconds'] * 1e3:.1f} ms vs baseline {b['seconds'] * 1e3:.1f} ms"))
+        if r["peak_mem_bytes"] > b["peak_mem_bytes"] * (1.0 + mem_tol):
+            bad.append((cid, f"peak memory {r['peak_mem_bytes'] / 2**20:.1f} MiB vs "
+                             f"baseline {b['peak_mem_bytes'] / 2**20:.1f} MiB"))
+        v, bv = r["value"], b["value"]
+        if not (v == bv or (np.isnan(v) and np.isnan(bv)) or np.isclose(v, bv, rtol=1e-6, atol=1e-9)):
+            bad.append((cid, f"result value {v!r} vs baseline {bv!r}"))
+    return bad
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--grid", choices=sorted(GRIDS), default="quick")
+    ap.add_argument("--only", action="append", help="benchmark name to run (repeatable)")
+    ap.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    ap.add_argument("--out", help="write all results as JSON")
+    ap.add_argument("--baseline", help="baseline JSON to compare against")
+    ap.add_argument("--save-baseline", help="write the results as a baseline JSON")
+    ap.add_argument("--time-tol", type=float, default=1.0, help="allowed relative slowdown (1.0 = 2x)")
+    ap.add_argument("--min-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    ap.add_argument("--mem-tol", type=float, default=0.25, help="allowed relative memory increase")
+    args = ap.parse_args(argv)
+
+    warnings.simplefilter("ignore")
+    selected = [c for c in cases(args.grid) if not args.only or c[0] in args.only]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        print(f"{'case':<95} {'ms':>10} {'rows/s':>12} {'peak MiB':>9}")
+        for name, params, builder in selected:
+            cid = case_id(name, params)
+            r = run_case(builder, params, args.repeat, tmpdir)
+            results[cid] = r
+            print(f"{cid:<95} {r['seconds'] * 1e3:10.2f} {r['rows_per_s']:12.0f} "
+                  f"{r['peak_mem_bytes'] / 2**20:9.2f}", flush=True)
+
+    doc = {"grid": args.grid, "machine": platform.node(), "python": platform.python_version(),
+           "created": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results}
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(doc, fh, indent=1)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_baseline)), exist_ok=True)
+        with open(args.save_baseline, "w") as fh:
+            json.dump(doc, fh, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if baseline.get("machine") != doc["machine"]:
+            print(f"\nnote: baseline was recorded on {baseline.get('machine')!r}, "
+                  f"this is {doc['machine']!r}; timings may not be comparable")
+        bad = compare(results, baseline, args.time_tol, args.mem_tol, args.min_ms)
+        missing = len([c for c in results if c not in baseline["results"]])
+        if missing:
+            print(f"\n{missing} case(s) not in the baseline")
+        if bad:
+            print(f"\nREGRESSIONS ({len(bad)}):")
+            for cid, msg in bad:
+                print(f"  {cid}: {msg}")
+            return 1
+        print("\nno regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Synthetic AOC-style trial data for benchmarks.
+
+Subjects × conditions × trials with a per-subject random intercept, a gaze
+deviation covariate (mean-centred over the whole sample, like Gaze_c in the
+analysis scripts) and alpha power depending on condition and gaze. A fraction of
+the alpha values is replaced by gross outliers for the IQR filter.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def make_aoc_data(n_subjects=30, n_conditions=3, n_trials=100, n_covariates=0,
+                  re_sd=1.0, resid_sd=2.0, gaze_slope=0.3, condition_step=0.25,
+                  outlier_rate=0.01, outlier_scale=10.0, seed=0):
+    """
+    Parameters
+    ----------
+    n_subjects, n_conditions, n_trials : design size (rows = product of the three)
+    n_covariates : extra standard-normal covariates X1..Xk (to scale formula terms)
+    re_sd : SD of the subject random intercept
+    resid_sd : residual SD
+    gaze_slope, condition_step : fixed effects of Gaze_c and per condition level
+    outlier_rate : fraction of AlphaPower values replaced by outliers
+    outlier_scale : outlier magnitude in residual SDs (random sign)
+
+    Columns: ID, Condition (L2, L4, ...), Trial, GazeDev, Gaze_c, X1..Xk, AlphaPower.
+    """
+    rng = np.random.default_rng(seed)
+    n = n_subjects * n_conditions * n_trials
+    subj = np.repeat(np.arange(n_subjects), n_conditions * n_trials)
+    cond = np.tile(np.repeat(np.arange(n_conditions), n_trials), n_subjects)
+    levels = np.array([f"L{2 * (i + 1)}" for i in range(n_conditions)])
+
+    gaze = rng.gamma(2.0, 0.5, n) + 0.1 * cond
+    df = pd.DataFrame({
+        "ID": pd.Categorical(np.char.add("S", subj.astype(str))),
+        "Condition": pd.Categorical(levels[cond], categories=levels, ordered=True),
+        "Trial": np.tile(np.arange(n_trials), n_subjects * n_conditions),
+        "GazeDev": gaze,
+        "Gaze_c": gaze - gaze.mean(),
+    })
+    y = (rng.normal(0.0, re_sd, n_subjects)[subj] + condition_step * cond
+         + gaze_slope * df["Gaze_c"].to_numpy() + rng.normal(0.0, resid_sd, n))
+    for k in range(n_covariates):
+        x = rng.normal(size=n)
+        df[f"X{k + 1}"] = x
+        y += 0.1 * x
+
+    n_out = int(round(outlier_rate * n))
+    if n_out:
+        idx = rng.choice(n, n_out, replace=False)
+        y[idx] += rng.choice([-1.0, 1.0], n_out) * outlier_scale * resid_sd
+    df["AlphaPower"] = y
+    return df
@@ -0,0 +1,149 @@
+"""
+Matrix-based contrast engine shared by the mixed-model helpers.
+
+Condition means are expressed as a level matrix L (levels × fixed effects) under
+treatment coding; a contrast matrix D over levels (pairs, trend, vs-control or
+user-defined) gives C = D L, and all estimates and SEs come from a single
+C β / diag(C V Cᵀ) evaluation.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+_P_ADJUST = {"fdr": "fdr_bh", "fdr_bh": "fdr_bh", "bh": "fdr_bh",
+             "bonf": "bonferroni", "bonferroni": "bonferroni", "holm": "holm"}
+
+
+def p_adjust(p, method="fdr_bh"):
+    """
+    Multiplicity-adjusted p-values (Benjamini–Hochberg, Bonferroni or Holm), from
+    statsmodels' multipletests applied to the finite p-values. NaN p-values (e.g.
+    a contrast with zero SE) stay NaN and do not count towards the number of tests;
+    multipletests on the raw array would count them (Bonferroni, Holm) or return
+    NaN for every p-value (fdr_bh).
+    """
+    from statsmodels.stats.multitest import multipletests
+
+    key = str(method).lower()
+    if key not in _P_ADJUST:
+        raise ValueError(f"Unknown p_adjust method: {method}")
+
+    p = np.asarray(p, dtype=float)
+    out = np.full(p.shape, np.nan)
+    ok = np.isfinite(p)
+    if ok.any():
+        out[ok] = multipletests(p[ok], method=_P_ADJUST[key])[1]
+    return out
+
+
+def level_matrix(param_names, levels, design_prefix, intercept="Intercept"):
+    """
+    Rows map fixed effects to the mean of each level under treatment coding:
+    mean(L) = Intercept + [design_prefix[T.L]] (the baseline level has no dummy).
+    Other regressors (e.g. a mean-centred covariate and its interactions) get 0.
+    """
+    pos = {nm: i for i, nm in enumerate(param_names)}
+    L = np.zeros((len(levels), len(param_names)))
+    L[:, pos[intercept]] = 1.0
+    for i, lev in enumerate(levels):
+        j = pos.get(f"{design_prefix}[T.{lev}]")
+        if j is not None:
+            L[i, j] = 1.0
+    return L
+
+
+def contrast_matrix(levels, contrasts="pairwise", control=None):
+    """
+    Contrast weights over levels and their labels.
+
+    contrasts : "pairwise"  all pairs (level_j - level_i, i < j, canonical order)
+                "control"   every level minus `control` (default: first level)
+                "trend"     orthogonal polynomial trends (linear, quadratic, ...)
+                array (m × k) or dict {label: weights} for custom contrasts
+    Returns (D, labels) with labels a list of (group1, group2) tuples; group2 is
+    None for contrasts that are not a simple difference.
+    """
+    levels = list(levels)
+    k = len(levels)
+
+    if isinstance(contrasts, str):
+        kind = contrasts.lower()
+        if kind == "pairwise":
+            i, j = np.triu_indices(k, 1)
+            D = np.zeros((len(i), k))
+            D[np.arange(len(i)), j] = 1.0
+            D[np.arange(len(i)), i] = -1.0
+            return D, [(levels[a], levels[b]) for a, b in zip(i, j)]
+        if kind == "control":
+            c = 0 if control is None else levels.index(control)
+            others = [j for j in range(k) if j != c]
+            D = np.zeros((len(others), k))
+            D[np.arange(len(others)), others] = 1.0
+            D[:, c] = -1.0
+            return D, [(levels[c], levels[j]) for j in others]
+        if kind == "trend":
+            # orthonormal polynomial basis over equally spaced levels (like R's contr.poly)
+            x = np.arange(k, dtype=float)
+            q, _ = np.linalg.qr(np.vander(x - x.mean(), k, increasing=True))
+            D = (q[:, 1:] * np.sign(q[-1, 1:])).T
+            names = ["linear", "quadratic", "cubic"] + [f"degree{d}" for d in range(4, k)]
+            return D, [(names[d], None) for d in range(k - 1)]
+        raise ValueError(f"Unknown contrasts: {contrasts}")
+
+    if isinstance(contrasts, dict):
+        labels = [(str(lab), None) for lab in contrasts]
+        D = np.asarray([np.asarray(w, dtype=float) for w in contrasts.values()])
+    else:
+        D = np.atleast_2d(np.asarray(contrasts, dtype=float))
+        labels = [(f"contrast{i + 1}", None) for i in range(D.shape[0])]
+    if D.shape[1] != k:
+        raise ValueError(f"Contrast weights have {D.shape[1]} columns for {k} levels")
+    return D, labels
+
+
+def contrast_table(C, beta, V, labels, p_adjust_method="fdr_bh", z_crit=1.96):
+    """
+    Wald tests for all rows of C at once: estimate = C β, SE = sqrt(diag(C V Cᵀ)),
+    two-sided normal p-values, CI and adjusted p (p_adj = p when method is None).
+    """
+    C = np.asarray(C, dtype=float)
+    beta = np.asarray(beta, dtype=float)
+    V = np.asarray(V, dtype=float)
+
+    est = C @ beta
+    se = np.sqrt(np.einsum("ij,jk,ik->i", C, V, C))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(se > 0, est / se, np.nan)
+    from scipy.stats import norm
+
+    p = 2.0 * (1.0 - norm.cdf(np.abs(z)))
+    finite = np.isfinite(se)
+    out = pd.DataFrame({
+        "group1": [g1 for g1, _ in labels],
+        "group2": [g2 for _, g2 in labels],
+        "estimate": est,
+        "se": se,
+        "z": z,
+        "p": p,
+        "ci_low": np.where(finite, est - z_crit * se, np.nan),
+        "ci_high": np.where(finite, est + z_crit * se, np.nan),
+    })
+    if p_adjust_method is not None and len(out) > 0:
+        out["p_adj"] = p_adjust(p, p_adjust_method)
+    else:
+        out["p_adj"] = out["p"]
+    return out
+
+
+def level_contrasts(res, levels, design_prefix, contrasts="pairwise", control=None,
+                    p_adjust_method="fdr_bh"):
+    """Contrasts between condition means of a fitted treatment-coded model."""
+    beta = res.params
+    V = res.cov_params()
+    names = list(beta.index)
+    L = level_matrix(names, levels, design_prefix)
+    D, labels = contrast_matrix(levels, contrasts, control=control)
+    V = V.reindex(index=names, columns=names).to_numpy() if isinstance(V, pd.DataFrame) else V
+    return contrast_table(D @ L, beta.to_numpy(), V, labels, p_adjust_method)
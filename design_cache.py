@@ -0,0 +1,211 @@
+"""
+Cache of patsy design matrices shared by families of related fits.
+
+Building a model from a formula makes patsy parse it and evaluate every factor on
+the DataFrame, including the categorical encoding, which for a few thousand rows
+costs about as much as a fast-solver fit. Related fits repeat this work: the full
+and reduced models of drop1_lrt / drop1_all, and the same predictors fitted to
+different dependent variables. DesignCache builds the right-hand side once per
+DataFrame and grouping column and reuses it:
+
+  * the same right-hand side with a different response shares the matrix (only the
+    response column is read);
+  * a right-hand side whose terms are a subset of a cached one (a reduced model) is
+    cut from it by selecting columns, provided the larger design uses exactly the
+    rows that are complete for the reduced model's own variables, and after
+    checking that patsy would code the remaining terms identically (same column
+    names; otherwise it is re-evaluated by patsy on those rows).
+
+A design therefore never depends on which fits ran before it: it always covers the
+complete cases of its own variables. Nested-model comparisons that need one sample
+(drop1_all) pass the complete cases of the full model as the data.
+
+Frames are identified by object identity (entries disappear with the frame): do
+not modify a DataFrame in place between fits that share a cache, or call clear().
+"""
+
+from __future__ import annotations
+
+import weakref
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from formula_utils import formula_columns
+
+Design = namedtuple("Design", ["X", "rows", "groups", "levels", "info", "complete"])
+Design.__doc__ = """\
+X : design matrix (DataFrame with the patsy column names, indexed by row position)
+rows : positions of the used rows in the data (complete predictors and group)
+groups : group labels of those rows
+levels : {column: categories} of the categorical predictors
+info : patsy DesignInfo of X
+complete : no row was dropped for missing predictors"""
+
+
+def _split(formula):
+    lhs, sep, rhs = formula.partition("~")
+    if not sep:
+        raise ValueError(f"Formula has no '~': {formula!r}")
+    return lhs.strip(), rhs.strip()
+
+
+def _env():
+    # formulas are evaluated with numpy available, as in smf.mixedlm called from
+    # mixedlm_helpers (e.g. np.log(y), np.power(x, 2))
+    from patsy import EvalEnvironment
+
+    return EvalEnvironment([{"np": np, "pd": pd}])
+
+
+def _terms(rhs):
+    from patsy import ModelDesc
+
+    return tuple(ModelDesc.from_formula(rhs).rhs_termlist)
+
+
+class DesignCache:
+    """
+    Parameters
+    ----------
+    maxsize : number of DataFrames (× grouping columns) whose designs are kept
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = int(maxsize)
+        self.hits = 0
+        self.derived = 0
+        self.misses = 0
+        self._frames = OrderedDict()
+
+    def _entry(self, data, group):
+        key = (id(data), group)
+        entry = self._frames.get(key)
+        if entry is not None and entry["ref"]() is data:
+            self._frames.move_to_end(key)
+            return entry
+        frames = self._frames
+
+        def _forget(_, key=key):
+            frames.pop(key, None)
+
+        entry = {"ref": weakref.ref(data, _forget), "frame": pd.DataFrame(index=pd.RangeIndex(len(data))),
+                 "designs": {}}
+        self._frames[key] = entry
+        while len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _columns(entry, data, cols):
+        """Model columns with a positional index; object columns become categoricals."""
+        frame = entry["frame"]
+        for col in cols:
+            if col not in frame.columns:
+                s = data[col].reset_index(drop=True)
+                frame[col] = pd.Categorical(s) if s.dtype == object else s
+        return frame
+
+    def design(self, rhs, data, group):
+        """Design of the right-hand side `rhs` (e.g. "Gaze_c * C(Condition)") on data."""
+        from patsy import dmatrix
+
+        entry = self._entry(data, group)
+        terms = _terms(rhs)
+        cached = entry["designs"].get(terms)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        cols = formula_columns(rhs, data.columns)
+        frame = self._columns(entry, data, cols + [group])
+        own = np.flatnonzero(frame[cols + [group]].notna().all(axis=1).to_numpy())
+        design = self._derive(entry, terms, rhs, frame, cols, own)
+        if design is None:
+            self.misses += 1
+            X = dmatrix(rhs, frame[cols], _env(), return_type="dataframe", NA_action="drop")
+            info = X.design_info
+            complete = len(X) == len(frame)
+            g = frame[group].to_numpy()[X.index]
+            ok = pd.notna(g)
+            if not ok.all():
+                X, g = X[ok], g[ok]
+            levels = {c: list(frame[c].cat.categories) for c in cols
+                      if isinstance(frame[c].dtype, pd.CategoricalDtype)}
+            design = Design(X, X.index.to_numpy(), g, levels, info, complete)
+        else:
+            self.derived += 1
+        entry["designs"][terms] = design
+        return design
+
+    def _derive(self, entry, terms, rhs, frame, cols, own):
+        """
+        Design of `terms` from a cached design of a superset of terms that uses
+        exactly the rows `own` (the complete cases of the reduced variables): cut by
+        columns, or re-evaluated on those rows when the terms are coded differently.
+        """
+        from patsy import dmatrix
+
+        wanted = set(terms)
+        for full_terms, full in entry["designs"].items():
+            if not wanted <= set(full_terms) or not np.array_equal(full.rows, own):
+                continue
+            sub = frame[cols].iloc[full.rows]
+            # column names encode the coding (treatment vs full rank); a one-row
+            # sample gives them, categoricals keep all their levels
+            sample = dmatrix(rhs, sub.iloc[:1], _env(), return_type="dataframe")
+            names = list(sample.columns)
+            slices = full.info.term_slices
+            cut = [c for t in terms for c in full.X.columns[slices[t]]]
+            levels = {c: v for c, v in full.levels.items() if c in cols}
+            if sorted(names) == sorted(cut):
+                return Design(full.X[names], full.rows, full.groups, levels, sample.design_info,
+                              full.complete)
+            # e.g. an interaction without its main effect: patsy codes it full rank
+            X = dmatrix(rhs, sub, _env(), return_type="dataframe", NA_action="raise")
+            return Design(X, full.rows, full.groups, levels, X.design_info, full.complete)
+        return None
+
+    def model_matrices(self, formula, data, group):
+        """
+        (endog, exog, groups, levels) for formula + (1|group): the response is read
+        from data (or evaluated by patsy for expressions such as np.log(y)), rows
+        with a missing response are dropped from the shared design.
+        """
+        from patsy import dmatrix
+
+        lhs, rhs = _split(formula)
+        d = self.design(rhs, data, group)
+        if lhs in data.columns:
+            y = pd.Series(data[lhs].to_numpy(dtype=float)[d.rows], index=d.X.index, name=lhs)
+        else:
+            Y = dmatrix(f"0 + {lhs}", data.reset_index(drop=True), _env(), return_type="dataframe")
+            y = Y.iloc[:, 0].reindex(d.X.index)
+        ok = y.notna().to_numpy()
+        if ok.all():
+            return y, d.X, d.groups, d.levels
+        return y[ok], d.X[ok], d.groups[ok], d.levels
+
+    def clear(self):
+        self._frames.clear()
+
+
+_default_design_cache = None
+
+
+def default_design_cache():
+    """Process-wide design cache."""
+    global _default_design_cache
+    if _default_design_cache is None:
+        _default_design_cache = DesignCache()
+    return _default_design_cache
+
+
+def resolve_design_cache(design):
+    """Map the `design` argument of the fit helpers to a DesignCache (or None)."""
+    if design is None or design is False:
+        return None
+    if design is True:
+        return default_design_cache()
+    return design
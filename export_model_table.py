@@ -1,132 +1,96 @@
 # export_model_table.py
 import math
+import os
 import re
+from xml.sax.saxutils import escape as xml_escape
 import numpy as np
 import pandas as pd
-from scipy import stats
-from docx import Document
-from docx.shared import Pt
-from docx.oxml.ns import qn
-from docx.enum.text import WD_ALIGN_PARAGRAPH
-
-def export_model_table(model_result, file_path):
-    def prettify_terms(term):
-        term = term.replace(":", " * ")
-        if term in ("Intercept", "const", "(Intercept)", "Intercept[0]"):
-            return "Intercept"
-        term = re.sub(r'([A-Za-z_][A-Za-z0-9_]*)(\[T\.([^\]]+)\])', r'\1 [\3]', term)
-        term = re.sub(r'np\.power\(([^,]+),\s*2\)', r'\1^2', term)
-        return term
-
-    def p_fmt(p):
-        if p is None or (isinstance(p, float) and (math.isnan(p) or math.isinf(p))):
-            return ""
-        if p <= 0.001:
-            return f"{p:.2e}"
-        return f"{p:.3f}"
-
-    def p_stars(p):
-        if p is None or (isinstance(p, float) and (math.isnan(p) or math.isinf(p))):
-            return ""
-        return "***" if p < 0.001 else ("**" if p < 0.01 else ("*" if p < 0.05 else ""))
-
-    def get_title(res):
-        # prefer formula when available
-        try:
-            f = getattr(res.model, "formula", None)
-            if isinstance(f, str):
-                return f
-        except Exception:
-            pass
-        try:
-            y = getattr(res.model, "endog_names", "y")
-            X = getattr(res.model, "exog_names", [])
-            if isinstance(X, (list, tuple)):
-                rhs = " + ".join([x for x in X if x not in ("Intercept", "const")])
-            else:
-                rhs = str(X)
-            return f"{y} ~ {rhs}" if rhs else y
-        except Exception:
-            return "Model"
+from collections import namedtuple
+from html import escape as html_escape
 
-    def as_series(obj):
-        return None if obj is None else pd.Series(obj, index=params.index, dtype=float)
+from instrumentation import instrumented
+from mixedlm_helpers import extract_fixed_effects
 
-    def confint_df(res):
-        try:
-            ci = res.conf_int()
-            if isinstance(ci, pd.DataFrame):
-                ci.columns = ["ci_low", "ci_high"]
-                return ci
-            ci = pd.DataFrame(ci, index=params.index, columns=["ci_low", "ci_high"])
-            return ci
-        except Exception:
-            if seS is None:
-                return None
-            lo = params - 1.96 * seS
-            hi = params + 1.96 * seS
-            return pd.DataFrame({"ci_low": lo, "ci_high": hi})
+# python-docx is only imported by the docx renderer
 
-    def safe_round(x, k):
-        try:
-            return np.round(float(x), k)
-        except Exception:
-            return np.nan
-
-    # ---------- fixed effects ----------
-    params = getattr(model_result, "params", None)
-    if params is None:
-        raise ValueError("Provided result has no .params; pass a fitted statsmodels result.")
-
-    if isinstance(params, (pd.Series, pd.DataFrame)):
-        params = params.squeeze()
-    params = pd.Series(params)
-
-    # Standard errors: try .bse, then .bse_fe (MixedLM)
-    seS = getattr(model_result, "bse", None)
-    if seS is None and hasattr(model_result, "bse_fe"):
-        seS = getattr(model_result, "bse_fe")
-        # align to fixed-effect names if present
-        try:
-            fe_names = getattr(model_result.model, "exog_names", None)
-            if isinstance(fe_names, list):
-                seS = pd.Series(seS, index=fe_names)
-        except Exception:
-            pass
-    seS = as_series(seS)
+ModelTables = namedtuple("ModelTables", ["title", "fixed", "variance"])
+
+
+def _prettify_term(term):
+    term = term.replace(":", " * ")
+    if term in ("Intercept", "const", "(Intercept)", "Intercept[0]"):
+        return "Intercept"
+    term = re.sub(r'([A-Za-z_][A-Za-z0-9_]*)(\[T\.([^\]]+)\])', r'\1 [\3]', term)
+    term = re.sub(r'np\.power\(([^,]+),\s*2\)', r'\1^2', term)
+    return term
+
+
+def _p_fmt(p):
+    if p is None or (isinstance(p, float) and (math.isnan(p) or math.isinf(p))):
+        return ""
+    if p <= 0.001:
+        return f"{p:.2e}"
+    return f"{p:.3f}"
+
+
+def _p_stars(p):
+    if p is None or (isinstance(p, float) and (math.isnan(p) or math.isinf(p))):
+        return ""
+    return "***" if p < 0.001 else ("**" if p < 0.01 else ("*" if p < 0.05 else ""))
+
+
+def _safe_round(x, k):
+    try:
+        return np.round(float(x), k)
+    except Exception:
+        return np.nan
 
-    # t/z statistics
-    statS = as_series(getattr(model_result, "tvalues", None))
-    if statS is None:
-        statS = as_series(getattr(model_result, "zvalues", None))
 
-    # p-values
-    pS = as_series(getattr(model_result, "pvalues", None))
+def _title(res):
+    # prefer formula when available
+    for obj in (getattr(res, "model", None), res):
+        f = getattr(obj, "formula", None)
+        if isinstance(f, str):
+            return f
+    try:
+        src = getattr(res, "model", None) or res
+        y = getattr(src, "endog_names", "y")
+        X = getattr(src, "exog_names", [])
+        if isinstance(X, (list, tuple)):
+            rhs = " + ".join([x for x in X if x not in ("Intercept", "const")])
+        else:
+            rhs = str(X)
+        return f"{y} ~ {rhs}" if rhs else y
+    except Exception:
+        return "Model"
 
-    # If anything missing, compute Wald stats/p from params & SE
-    if statS is None and seS is not None:
-        statS = (params / seS)
-    if pS is None and statS is not None:
-        # two-sided normal approximation (matches statsmodels MixedLM)
-        pS = 2.0 * (1.0 - stats.norm.cdf(np.abs(statS)))
 
-    ci = confint_df(model_result)
+@instrumented
+def model_tables(model_result):
+    """
+    Extract the tables `export_model_table` shows, independent of the output format.
+
+    Returns ModelTables(title, fixed, variance): `fixed` has the display columns
+    Variable, β, SE, CI, t/z-value, p-value, stars (statistics from
+    mixedlm_helpers.extract_fixed_effects, unscaled); `variance` has Variance, SD and
+    Goodness of fit. Compute once, then pass to any of the render_* functions.
+    """
+    fe = extract_fixed_effects(model_result, scale_re=False, ci_fallback=True)
 
     df = pd.DataFrame({
-        "Variable": [prettify_terms(t) for t in params.index],
-        "β": [safe_round(v, 3) for v in params.values],
-        "SE": [safe_round(seS.get(i), 3) if seS is not None and i in seS.index else np.nan for i in params.index],
-        "t/z-value": [safe_round(statS.get(i), 3) if statS is not None and i in statS.index else np.nan for i in params.index],
-        "p_raw": [pS.get(i) if pS is not None and i in pS.index else np.nan for i in params.index]
+        "Variable": [_prettify_term(str(t)) for t in fe["Term"]],
+        "β": [_safe_round(v, 3) for v in fe["beta"]],
+        "SE": [_safe_round(v, 3) for v in fe["SE"]],
+        "t/z-value": [_safe_round(v, 3) for v in fe["stat"]],
+        "p_raw": fe["p"].values,
     })
-    if ci is not None:
-        ci = ci.reindex(params.index)
-        df["CI"] = [f"{safe_round(lo,3)} – {safe_round(hi,3)}" for lo, hi in zip(ci["ci_low"], ci["ci_high"])]
+    if fe.attrs.get("ci") is not None:
+        df["CI"] = [f"{_safe_round(lo,3)} – {_safe_round(hi,3)}" for lo, hi in zip(fe["CI_low"], fe["CI_high"])]
     else:
         df["CI"] = ""
 
-    df["p-value"] = [p_fmt(p) for p in df["p_raw"]]
-    df["stars"] = [p_stars(p) for p in df["p_raw"]]
+    df["p-value"] = [_p_fmt(p) for p in df["p_raw"]]
+    df["stars"] = [_p_stars(p) for p in df["p_raw"]]
     fixed_tbl = df[["Variable", "β", "SE", "CI", "t/z-value", "p-value", "stars"]]
 
     # ---------- variance components ----------
@@ -138,6 +102,8 @@ def export_model_table(model_result, file_path):
         try:
             sds = np.sqrt(np.diag(np.asarray(cov_re)))
             names = getattr(getattr(model_result, "model", None), "exog_re_names", None)
+            if names is None:
+                names = getattr(model_result, "exog_re_names", None)
             names = list(names) if names is not None else [f"RE_{i+1}" for i in range(len(sds))]
             for nm, sd in zip(names, sds):
                 label = "Random intercept" if nm in ("Intercept", "(Intercept)") else nm
@@ -160,54 +126,249 @@ def export_model_table(model_result, file_path):
     var_tbl["Goodness of fit"] = ""
     var_tbl.loc[var_tbl.index[0], "Goodness of fit"] = f"Log likelihood  {np.round(ll, 1) if not (isinstance(ll, float) and math.isnan(ll)) else ''}"
 
-    # ---------- Word document ----------
+    return ModelTables(_title(model_result), fixed_tbl, var_tbl)
+
+
+def _fixed_headers(fixed_tbl):
+    return ["Variable", "β", "SE", "CI", "t-value" if "t" in fixed_tbl["t/z-value"].astype(str).to_string() else "t/z-value", "p-value"]
+
+
+def _fmt(x, spec):
+    return "" if pd.isna(x) else format(x, spec)
+
+
+def _fixed_cells(fixed_tbl):
+    """Display strings per row: Variable, β, SE, CI, t/z, p-value, stars."""
+    return [
+        [str(var), _fmt(b, ".3f"), _fmt(se, ".3f"), str(ci), _fmt(st, ".3f"),
+         pv if isinstance(pv, str) else "", stars]
+        for var, b, se, ci, st, pv, stars in zip(
+            fixed_tbl["Variable"], fixed_tbl["β"], fixed_tbl["SE"], fixed_tbl["CI"],
+            fixed_tbl["t/z-value"], fixed_tbl["p-value"], fixed_tbl["stars"],
+        )
+    ]
+
+
+def _variance_cells(var_tbl):
+    return [[str(v), _fmt(sd, ".2f"), str(gof)]
+            for v, sd, gof in zip(var_tbl["Variance"], var_tbl["SD"], var_tbl["Goodness of fit"])]
+
+
+def _as_tables(obj):
+    """Accept fitted results, ModelTables, or a list of either."""
+    items = obj if isinstance(obj, (list, tuple)) and not isinstance(obj, ModelTables) else [obj]
+    return [x if isinstance(x, ModelTables) else model_tables(x) for x in items]
+
+
+# ---------- lightweight text renderers ----------
+
+@instrumented
+def render_csv(results):
+    """One CSV with a Section column ("fixed" / "variance") per model."""
+    frames = []
+    for t in _as_tables(results):
+        rows = [["fixed", *c[:6], c[6], "", ""] for c in _fixed_cells(t.fixed)]
+        rows += [["variance", v, "", "", "", "", "", "", sd, gof] for v, sd, gof in _variance_cells(t.variance)]
+        frame = pd.DataFrame(rows, columns=["Section", "Variable", "β", "SE", "CI", "t/z-value",
+                                            "p-value", "stars", "SD", "Goodness of fit"])
+        frame.insert(0, "Model", t.title)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True).to_csv(index=False)
+
+
+def _md_table(headers, rows):
+    esc = lambda s: s.replace("|", "\\|")
+    lines = ["| " + " | ".join(esc(h) for h in headers) + " |",
+             "|" + "|".join(" --- " for _ in headers) + "|"]
+    lines += ["| " + " | ".join(esc(c) for c in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+@instrumented
+def render_markdown(results):
+    parts = []
+    for t in _as_tables(results):
+        fixed = [c[:5] + [c[5] + c[6].replace("*", "\\*")] for c in _fixed_cells(t.fixed)]
+        parts += [f"**{t.title}**", _md_table(_fixed_headers(t.fixed), fixed),
+                  "**Variance components**", _md_table(["Variance", "SD", "Goodness of fit"], _variance_cells(t.variance))]
+    return "\n\n".join(parts) + "\n"
+
+
+_LATEX_SPECIAL = {"&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_", "{": r"\{", "}": r"\}",
+                  "~": r"\textasciitilde{}", "^": r"\textasciicircum{}", "\\": r"\textbackslash{}",
+                  "β": r"$\beta$", "–": "--"}
+
+
+def _tex(s):
+    return "".join(_LATEX_SPECIAL.get(ch, ch) for ch in s)
+
+
+def _tex_table(headers, rows):
+    lines = [r"\begin{tabular}{" + "l" * len(headers) + "}", r"\hline",
+             " & ".join(r"\textbf{" + _tex(h) + "}" for h in headers) + r" \\", r"\hline"]
+    lines += [" & ".join(row) + r" \\" for row in rows]
+    lines += [r"\hline", r"\end{tabular}"]
+    return "\n".join(lines)
+
+
+@instrumented
+def render_latex(results):
+    parts = []
+    for t in _as_tables(results):
+        fixed = [[_tex(x) for x in c[:5]] + [_tex(c[5]) + (r"\textbf{" + c[6] + "}" if c[6] else "")]
+                 for c in _fixed_cells(t.fixed)]
+        var = [[_tex(x) for x in c] for c in _variance_cells(t.variance)]
+        parts += [r"\textbf{" + _tex(t.title) + "}", "", _tex_table(_fixed_headers(t.fixed), fixed), "",
+                  r"\textbf{Variance components}", "", _tex_table(["Variance", "SD", "Goodness of fit"], var)]
+    return "\n".join(parts) + "\n"
+
+
+def _html_table(headers, rows):
+    head = "".join(f"<th>{html_escape(h)}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows)
+    return f"<table>\n<thead><tr>{head}</tr></thead>\n<tbody>{body}</tbody>\n</table>"
+
+
+@instrumented
+def render_html(results):
+    parts = []
+    for t in _as_tables(results):
+        fixed = [[html_escape(x) for x in c[:5]] + [html_escape(c[5]) + (f"<b>{c[6]}</b>" if c[6] else "")]
+                 for c in _fixed_cells(t.fixed)]
+        var = [[html_escape(x) for x in c] for c in _variance_cells(t.variance)]
+        parts += [f"<h2>{html_escape(t.title)}</h2>", _html_table(_fixed_headers(t.fixed), fixed),
+                  "<h3>Variance components</h3>", _html_table(["Variance", "SD", "Goodness of fit"], var)]
+    return "\n".join(parts) + "\n"
+
+
+# ---------- Word document ----------
+
+def _new_document():
+    from docx import Document
+    from docx.oxml.ns import qn
+    from docx.shared import Pt
+
     doc = Document()
     style = doc.styles["Normal"]
     style.font.name = "Calibri"
     style._element.rPr.rFonts.set(qn("w:eastAsia"), "Calibri")
     style.font.size = Pt(11)
+    return doc
+
+
+def _run_xml(text, bold=False):
+    if text == "":
+        return "<w:r/>" if not bold else "<w:r><w:rPr><w:b/></w:rPr></w:r>"
+    space = ' xml:space="preserve"' if text[0].isspace() or text[-1].isspace() else ""
+    rpr = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f"<w:r>{rpr}<w:t{space}>{xml_escape(text)}</w:t></w:r>"
+
+
+def _append_rows(table, rows):
+    """
+    Append body rows in one XML parse instead of add_row()/cell.text per cell.
+    Each row is a list of cells; a cell is a list of (text, bold) runs. The markup is
+    what python-docx writes for `cell.text = ...` / `paragraph.add_run(...)`.
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    tbl = table._tbl
+    widths = [int(w) for w in tbl.xpath("./w:tblGrid/w:gridCol/@w:w")]
+    tcs = [f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{w}"/></w:tcPr>' for w in widths]
+    parts = [f"<w:tbl {nsdecls('w')}>"]
+    for row in rows:
+        parts.append("<w:tr>")
+        for tc, runs in zip(tcs, row):
+            parts.append(tc + "<w:p>" + "".join(_run_xml(t, b) for t, b in runs) + "</w:p></w:tc>")
+        parts.append("</w:tr>")
+    parts.append("</w:tbl>")
+    for tr in parse_xml("".join(parts)).iterchildren():
+        tbl.append(tr)
+
+
+def _header_table(doc, headers):
+    table = doc.add_table(rows=1, cols=len(headers))
+    for j, h in enumerate(headers):
+        run = table.rows[0].cells[j].paragraphs[0].add_run(h); run.bold = True
+    return table
+
+
+def _add_model_section(doc, title, fixed_tbl, var_tbl):
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt
 
-    title = get_title(model_result)
     p = doc.add_paragraph()
     r = p.add_run(title)
     r.bold = True
     r.font.size = Pt(15)
     doc.add_paragraph("")
 
-    headers = ["Variable", "β", "SE", "CI", "t-value" if "t" in fixed_tbl["t/z-value"].astype(str).to_string() else "t/z-value", "p-value"]
-    table = doc.add_table(rows=1, cols=len(headers))
-    for j, h in enumerate(headers):
-        run = table.rows[0].cells[j].paragraphs[0].add_run(h); run.bold = True
-
-    for _, row in fixed_tbl.iterrows():
-        cells = table.add_row().cells
-        cells[0].text = str(row["Variable"])
-        cells[1].text = "" if np.isnan(row["β"]) else f"{row['β']:.3f}"
-        cells[2].text = "" if np.isnan(row["SE"]) else f"{row['SE']:.3f}"
-        cells[3].text = str(row["CI"])
-        cells[4].text = "" if np.isnan(row["t/z-value"]) else f"{row['t/z-value']:.3f}"
-        pcell = cells[5].paragraphs[0]
-        pcell.add_run(row["p-value"] if isinstance(row["p-value"], str) else "")
-        if row["stars"]:
-            star = pcell.add_run(row["stars"]); star.bold = True
+    table = _header_table(doc, _fixed_headers(fixed_tbl))
+    rows = []
+    for *cells, pv, stars in _fixed_cells(fixed_tbl):
+        pcell = [(pv, False)]
+        if stars:
+            pcell.append((stars, True))
+        rows.append([[(c, False)] for c in cells] + [pcell])
+    _append_rows(table, rows)
 
     doc.add_paragraph("")
     t = doc.add_paragraph(); rr = t.add_run("Variance components"); rr.bold = True; rr.font.size = Pt(12)
     doc.add_paragraph("")
-    vheaders = ["Variance", "SD", "Goodness of fit"]
-    vtable = doc.add_table(rows=1, cols=len(vheaders))
-    for j, h in enumerate(vheaders):
-        run = vtable.rows[0].cells[j].paragraphs[0].add_run(h); run.bold = True
-    for _, row in var_tbl.iterrows():
-        cells = vtable.add_row().cells
-        cells[0].text = str(row["Variance"])
-        cells[1].text = "" if pd.isna(row["SD"]) else f"{row['SD']:.2f}"
-        cells[2].text = str(row["Goodness of fit"])
+    vtable = _header_table(doc, ["Variance", "SD", "Goodness of fit"])
+    _append_rows(vtable, [[[(c, False)] for c in row] for row in _variance_cells(var_tbl)])
 
     for tbl in (table, vtable):
         for cell in tbl.rows[0].cells:
             for para in cell.paragraphs:
                 para.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
+
+_RENDERERS = {".csv": render_csv, ".md": render_markdown, ".tex": render_latex,
+              ".html": render_html, ".htm": render_html}
+
+
+@instrumented
+def render_docx(results, file_path, titles=None):
+    """Word document with one section per model (separated by page breaks)."""
+    doc = _new_document()
+    for i, t in enumerate(_as_tables(results)):
+        title = t.title if titles is None else titles[i]
+        if i > 0:
+            doc.add_page_break()
+        _add_model_section(doc, title, t.fixed, t.variance)
     doc.save(file_path)
-    
\ No newline at end of file
+
+
+@instrumented
+def export_model_table(model_result, file_path, format="docx"):
+    """
+    Write one fitted model's tables to file_path: a Word document whatever the
+    extension, unless `format` names another renderer ("csv", "md", "tex", "html").
+    """
+    export_model_tables([model_result], file_path, format=format)
+
+
+@instrumented
+def export_model_tables(model_results, file_path, titles=None, format=None):
+    """
+    Write several fitted models (or precomputed ModelTables) into one file, one
+    section per model. `format` is "docx" (python-docx), "csv", "md", "tex" or
+    "html"; by default it follows the extension of file_path (.docx for unknown
+    extensions), and only docx needs python-docx. `titles` optionally overrides the
+    per-model headings (default: the model formula).
+    """
+    if format is None:
+        format = os.path.splitext(str(file_path))[1].lower().lstrip(".")
+        format = format if "." + format in _RENDERERS else "docx"
+    if format == "docx":
+        render_docx(model_results, file_path, titles=titles)
+        return
+    if "." + format not in _RENDERERS:
+        raise ValueError(f"Unknown format: {format!r}")
+    tables = _as_tables(model_results)
+    if titles is not None:
+        tables = [t._replace(title=title) for t, title in zip(tables, titles)]
+    with open(file_path, "w", encoding="utf-8") as fh:
+        fh.write(_RENDERERS["." + format](tables))
@@ -0,0 +1,143 @@
+"""
+Content-addressed cache for fitted models.
+
+A fit is identified by a hash of the formula, grouping column, fit options and the
+content of the data columns it actually uses, so the same model fitted from
+different scripts (drop1_lrt, contrasts, export_model_table, ...) is computed once.
+Two tiers: an in-memory LRU and an optional on-disk directory of pickles with a
+size cap (least recently used files are evicted first).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class FitCache:
+    """
+    Parameters
+    ----------
+    maxsize : number of results kept in memory
+    cache_dir : directory for the on-disk tier (None disables it)
+    max_bytes : size cap of the on-disk tier
+    """
+
+    def __init__(self, maxsize=128, cache_dir=None, max_bytes=2 * 1024**3):
+        self.maxsize = int(maxsize)
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._mem = OrderedDict()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(kind, formula, group, options, data, columns):
+        """Hash of everything a fit depends on; `columns` are the data columns it reads."""
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((kind, formula, group, sorted(options.items()), len(data))).encode())
+        for col in sorted(set(columns)):
+            s = data[col]
+            h.update(repr((col, str(s.dtype))).encode())
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                h.update(repr((list(s.cat.categories), s.cat.ordered)).encode())
+            h.update(pd.util.hash_pandas_object(s, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _remember(self, key, value):
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+
+    def get(self, key, default=None):
+        if key in self._mem:
+            self._mem.move_to_end(key)
+            self.hits += 1
+            return self._mem[key]
+        if self.cache_dir is not None:
+            path = self._path(key)
+            try:
+                with open(path, "rb") as fh:
+                    value = pickle.load(fh)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                pass
+            else:
+                os.utime(path)          # mark as recently used for eviction
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if self.cache_dir is None:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                st = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((st.st_mtime, st.st_size, name))
+        total = sum(e[1] for e in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            total -= size
+
+    def get_or_fit(self, key, fit):
+        """Return the cached result for key, calling fit() and storing its result on a miss."""
+        _missing = object()
+        value = self.get(key, _missing)
+        if value is _missing:
+            value = fit()
+            self.put(key, value)
+        return value
+
+    def clear(self, disk=False):
+        self._mem.clear()
+        if disk and self.cache_dir is not None:
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.cache_dir, name))
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide cache; the disk tier is enabled by setting AOC_FIT_CACHE_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = FitCache(cache_dir=os.environ.get("AOC_FIT_CACHE_DIR"))
+    return _default_cache
+
+
+def resolve_cache(cache):
+    """Map the `cache` argument of the fit helpers to a FitCache (or None)."""
+    if cache is None or cache is False:
+        return None
+    if cache is True:
+        return default_cache()
+    return cache
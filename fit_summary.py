@@ -0,0 +1,231 @@
+"""
+Compact, serializable summaries of fitted models.
+
+Everything downstream of a fit (drop1_lrt, the contrast functions,
+mixedlm_fixed_effects_to_df, export_model_table, drop1_all, lr_effect_sizes via
+nobs) reads a handful of fields: params and their covariance, llf, df_modelwc,
+scale, cov_re and a few names. A MixedLMResults additionally holds the model with
+its data and design matrices, so it pickles into a blob of the size of the data.
+FitSummary keeps only those fields, as numpy arrays in __slots__, and exposes the
+same attribute names, so it can be passed to every helper in place of the result:
+
+    s = summarize(fit_mixedlm(formula, df, "ID"))
+    mixedlm_pairwise_contrasts-style tables, drop1_lrt(s, s_red), export_model_table(s, path)
+
+Many summaries are stored together in one .npz (save_summaries / load_summaries):
+the arrays of all models are concatenated, so there is no per-model pickle.
+Parametric-bootstrap LRTs (drop1_lrt(method="bootstrap")) refit on the data and
+still need the full statsmodels results.
+"""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+
+# scalar fields, stored as one float per model in save_summaries
+_SCALARS = ("llf", "scale", "df_modelwc", "nobs", "n_groups", "k_fe", "n_iter")
+# string/bool fields, stored in the JSON header
+_META = ("formula", "endog_names", "method", "reml", "converged", "fit_optimizer")
+
+
+class FitSummary:
+    """
+    The fields of a fitted mixed model (or OLS) that the helpers read.
+
+    params : (k,) fixed effects followed by the variance parameters, named by `names`
+    cov : (k, k) covariance of params
+    cov_re : (q, q) random-effects covariance on the DV scale, named by exog_re_names
+    cov_re_unscaled : cov_re / scale (statsmodels parameterization)
+    """
+
+    __slots__ = ("names", "_params", "_cov", "_cov_re", "cov_re_unscaled", "exog_re_names",
+                 "llf", "scale", "df_modelwc", "nobs", "n_groups", "k_fe", "n_iter") + _META
+
+    def __init__(self, names, params, cov, cov_re=None, exog_re_names=(), llf=np.nan,
+                 scale=np.nan, df_modelwc=None, nobs=np.nan, n_groups=None, k_fe=None,
+                 formula=None, endog_names=None, method=None, reml=None, converged=None,
+                 n_iter=None, fit_optimizer=None):
+        self.names = list(names)
+        self._params = np.asarray(params, dtype=float)
+        self._cov = np.asarray(cov, dtype=float).reshape(len(self.names), len(self.names))
+        self.exog_re_names = list(exog_re_names)
+        q = len(self.exog_re_names)
+        self._cov_re = None if cov_re is None else np.asarray(cov_re, dtype=float).reshape(q, q)
+        self.scale = float(scale)
+        self.cov_re_unscaled = None if cov_re is None else self._cov_re / self.scale
+        self.llf = float(llf)
+        self.df_modelwc = len(self.names) if df_modelwc is None else int(df_modelwc)
+        self.nobs = float(nobs)
+        self.n_groups = n_groups
+        self.k_fe = len(self.names) - (q * (q + 1)) // 2 if k_fe is None else int(k_fe)
+        self.n_iter = n_iter
+        self.formula = formula
+        self.endog_names = endog_names
+        self.method = method
+        self.reml = reml
+        self.converged = converged
+        self.fit_optimizer = fit_optimizer
+
+    @classmethod
+    def from_result(cls, res):
+        """Summary of a statsmodels result (MixedLM, OLS) or a lmm_solver result."""
+        if isinstance(res, cls):
+            return res
+        model = getattr(res, "model", None)
+
+        def attr(name, default=None):
+            for obj in (res, model):
+                val = getattr(obj, name, None)
+                if val is not None:
+                    return val
+            return default
+
+        params = pd.Series(res.params)
+        cov = res.cov_params()
+        if isinstance(cov, pd.DataFrame):
+            cov = cov.reindex(index=params.index, columns=params.index)
+        cov_re = getattr(res, "cov_re", None)
+        re_names = attr("exog_re_names", [])
+        if cov_re is not None and not len(re_names):
+            re_names = [f"RE_{i + 1}" for i in range(np.asarray(cov_re).shape[0])]
+        scale = attr("scale", attr("mse_resid", np.nan))
+        df_modelwc = getattr(res, "df_modelwc", None)
+        if df_modelwc is None and getattr(res, "df_model", None) is not None:
+            df_modelwc = res.df_model + int(attr("k_constant", 0))      # OLS
+        hist = getattr(res, "hist", None)
+        n_iter = getattr(res, "n_iter", None)
+        if n_iter is None and hist:
+            n_iter = hist[-1].get("iterations", hist[-1].get("fcalls"))
+        endog = attr("endog_names")
+        return cls(
+            params.index, params.to_numpy(), np.asarray(cov), cov_re, re_names,
+            llf=getattr(res, "llf", np.nan), scale=scale, df_modelwc=df_modelwc,
+            nobs=attr("nobs", np.nan), n_groups=attr("n_groups"), k_fe=attr("k_fe"),
+            formula=attr("formula") if isinstance(attr("formula"), str) else None,
+            endog_names=endog if isinstance(endog, str) else None,
+            method=getattr(res, "method", None) if isinstance(getattr(res, "method", None), str) else None,
+            reml=None if getattr(res, "reml", None) is None else bool(res.reml),
+            converged=None if getattr(res, "converged", None) is None else bool(res.converged),
+            n_iter=None if n_iter is None else int(n_iter),
+            fit_optimizer=getattr(res, "fit_optimizer", None),
+        )
+
+    # --- the MixedLMResults interface read by the helpers ---------------------------
+
+    @property
+    def params(self):
+        return pd.Series(self._params, index=self.names)
+
+    @property
+    def fe_params(self):
+        return self.params.iloc[: self.k_fe]
+
+    def cov_params(self):
+        return pd.DataFrame(self._cov, index=self.names, columns=self.names)
+
+    @property
+    def bse(self):
+        with np.errstate(invalid="ignore"):
+            return pd.Series(np.sqrt(np.diag(self._cov)), index=self.names)
+
+    @property
+    def bse_fe(self):
+        return self.bse.iloc[: self.k_fe]
+
+    @property
+    def tvalues(self):
+        return self.params / self.bse
+
+    @property
+    def pvalues(self):
+        from scipy.stats import norm
+
+        return pd.Series(2.0 * norm.sf(np.abs(self.tvalues)), index=self.names)
+
+    def conf_int(self, alpha=0.05):
+        from scipy.stats import norm
+
+        q = norm.ppf(1.0 - alpha / 2.0)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+    @property
+    def cov_re(self):
+        if self._cov_re is None:
+            return None
+        return pd.DataFrame(self._cov_re, index=self.exog_re_names, columns=self.exog_re_names)
+
+    @property
+    def exog_names(self):
+        return self.names[: self.k_fe]
+
+    def __repr__(self):
+        return (f"FitSummary({self.formula or self.endog_names!r}, k={len(self.names)}, "
+                f"llf={self.llf:.4f}, nobs={self.nobs:g})")
+
+    # --- serialization ---------------------------------------------------------------
+
+    def to_npz(self, path):
+        save_summaries([self], path)
+
+    @classmethod
+    def from_npz(cls, path):
+        return load_summaries(path)[0]
+
+
+def summarize(res):
+    """FitSummary of a fitted model (summaries are returned unchanged)."""
+    return FitSummary.from_result(res)
+
+
+def save_summaries(summaries, path, compressed=False):
+    """
+    Write many FitSummary objects (or fitted results) to one .npz.
+
+    Parameters and covariances of all models are concatenated into flat arrays with
+    offsets; names and string fields go into a JSON header.
+    """
+    summaries = [summarize(s) for s in summaries]
+    k = np.array([len(s.names) for s in summaries], dtype=np.int64)
+    q = np.array([len(s.exog_re_names) for s in summaries], dtype=np.int64)
+    empty = np.empty(0)
+    arrays = {
+        "k": k,
+        "q": q,
+        "params": np.concatenate([s._params for s in summaries] or [empty]),
+        "cov": np.concatenate([s._cov.ravel() for s in summaries] or [empty]),
+        "cov_re": np.concatenate([np.full(qi * qi, np.nan) if s._cov_re is None else s._cov_re.ravel()
+                                  for s, qi in zip(summaries, q)] or [empty]),
+        "has_re": np.array([s._cov_re is not None for s in summaries], dtype=bool),
+    }
+    for f in _SCALARS:
+        arrays[f] = np.array([np.nan if getattr(s, f) is None else getattr(s, f) for s in summaries],
+                             dtype=float)
+    header = [{"names": s.names, "exog_re_names": s.exog_re_names, **{f: getattr(s, f) for f in _META}}
+              for s in summaries]
+    arrays["header"] = np.frombuffer(json.dumps(header).encode(), dtype=np.uint8)
+    (np.savez_compressed if compressed else np.savez)(path, **arrays)
+
+
+def load_summaries(path):
+    """Read the FitSummary list written by save_summaries."""
+    with np.load(path) as z:
+        a = {key: z[key] for key in z.files}
+    header = json.loads(a["header"].tobytes().decode())
+    ends_p = np.cumsum(a["k"])
+    ends_c = np.cumsum(a["k"] ** 2)
+    ends_r = np.cumsum(a["q"] ** 2)
+    out = []
+    for i, h in enumerate(header):
+        sl = lambda ends, i=i: slice(ends[i - 1] if i else 0, ends[i])     # noqa: E731
+        scalars = {f: a[f][i] for f in _SCALARS}
+        for f in ("n_groups", "k_fe", "n_iter", "df_modelwc"):
+            scalars[f] = None if np.isnan(scalars[f]) else int(scalars[f])
+        out.append(FitSummary(
+            h["names"], a["params"][sl(ends_p)], a["cov"][sl(ends_c)],
+            a["cov_re"][sl(ends_r)] if a["has_re"][i] else None, h["exog_re_names"],
+            **scalars, **{f: h[f] for f in _META},
+        ))
+    return out
@@ -0,0 +1,21 @@
+"""Helpers for patsy formula strings that do not need patsy itself."""
+
+from __future__ import annotations
+
+import re
+
+
+def formula_columns(formula, columns):
+    """
+    Data columns referenced by a patsy formula, in order of first appearance.
+    Picks up bare names (`Gaze_c`, `C(Condition)`, `np.power(x, 2)`) and Q("...")
+    quoted names; only names present in `columns` are returned.
+    """
+    columns = set(columns)
+    quoted = re.findall(r"""Q\(\s*['"]([^'"]+)['"]\s*\)""", formula)
+    names = re.findall(r"[A-Za-z_][A-Za-z0-9_]*", formula)
+    out = []
+    for nm in quoted + names:
+        if nm in columns and nm not in out:
+            out.append(nm)
+    return out
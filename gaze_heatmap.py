@@ -0,0 +1,149 @@
+"""
+Batched gaze heatmaps (Python port of computeGazeHeatmap.m).
+
+For every trial, as in the MATLAB function:
+  1. samples outside the screen are dropped;
+  2. blinks are removed: samples with y outside `blink_y` and everything within
+     `blink_window` seconds around them (counted over the remaining samples) are
+     set to NaN;
+  3. the samples are binned on a num_bins × num_bins grid of edges
+     (histcounts2 semantics, so num_bins - 1 bins per axis), divided by the number
+     of on-screen samples (proportion of time per bin);
+  4. the map is smoothed with a Gaussian of `smoothing_factor` bins (imgaussfilt:
+     kernel radius ceil(2σ), replicated borders).
+
+All trials of a chunk are processed together with array operations: the blink
+windows come from a cumulative sum over the compacted sample order, and the binning
+is a single bincount over (trial, y bin, x bin). The input may be a memory-mapped
+(trials × 2 × samples) array (extra channels such as pupil size are ignored).
+"""
+
+from __future__ import annotations
+
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+GazeHeatmaps = namedtuple("GazeHeatmaps", ["maps", "x_edges", "y_edges", "n_valid"])
+GazeHeatmaps.__doc__ = """\
+maps : (trials, y bins, x bins) float32 proportion of time per bin (smoothed),
+       rows ordered like powspctrm of the MATLAB output (chan_freq_time, y × x)
+x_edges, y_edges : bin edges in pixels
+n_valid : on-screen samples per trial (the normalization denominator)"""
+
+
+def _blink_mask(valid, blink, win):
+    """
+    Samples to remove: within `win` samples of a blink, where distances are counted
+    over the valid (on-screen) samples of each trial only.
+    """
+    n_trials, n_samples = valid.shape
+    pos = np.cumsum(valid, axis=1) - 1                    # position in the compacted trial
+    rows = np.broadcast_to(np.arange(n_trials)[:, None], valid.shape)
+    comp = np.zeros((n_trials, n_samples + 1), dtype=np.int32)
+    comp[rows[valid], pos[valid] + 1] = blink[valid]
+    csum = np.cumsum(comp, axis=1)                        # csum[:, k] = blinks at positions < k
+    p = np.where(valid, pos, 0)
+    hi = np.minimum(p + win + 1, n_samples)
+    lo = np.maximum(p - win, 0)
+    near = np.take_along_axis(csum, hi, axis=1) - np.take_along_axis(csum, lo, axis=1) > 0
+    return valid & near
+
+
+def _gaussian_smooth(maps, sigma):
+    from scipy.ndimage import gaussian_filter
+
+    if sigma <= 0:
+        return maps
+    # imgaussfilt: filter size 2*ceil(2*sigma)+1, 'replicate' padding
+    truncate = math.ceil(2.0 * sigma) / sigma
+    return gaussian_filter(maps, sigma=(0.0, sigma, sigma), mode="nearest", truncate=truncate)
+
+
+def compute_gaze_heatmaps(data, num_bins, smoothing_factor, screen=(800, 600), fs=500.0,
+                          blink_window=0.1, blink_y=None, chunk_trials=512):
+    """
+    Gaze heatmaps for all trials of a (trials × channels × samples) array.
+
+    Parameters
+    ----------
+    data : array (trials, ≥2, samples) with x and y in pixels in channels 0 and 1;
+           NaN samples (e.g. padding) count as off-screen. May be a np.memmap: it
+           is read `chunk_trials` trials at a time.
+    num_bins : number of grid edges per axis (num_bins - 1 bins, like the MATLAB code)
+    smoothing_factor : Gaussian SD in bins
+    screen : (width, height) in pixels
+    fs : sampling rate in Hz
+    blink_window : half-width in seconds of the window removed around blink samples
+                   (0.1 s = 50 samples at 500 Hz, as in computeGazeHeatmap.m)
+    blink_y : (low, high) y range outside which a sample counts as a blink
+              (default: height/6 and 5·height/6, i.e. 100 and 500 px for 600 px)
+
+    Returns GazeHeatmaps (maps as float32).
+    """
+    width, height = float(screen[0]), float(screen[1])
+    if blink_y is None:
+        blink_y = (height / 6.0, 5.0 * height / 6.0)
+    win = int(round(blink_window * fs))
+    x_edges = np.linspace(0.0, width, num_bins)
+    y_edges = np.linspace(0.0, height, num_bins)
+    nb = num_bins - 1
+
+    n_trials = data.shape[0]
+    maps = np.empty((n_trials, nb, nb), dtype=np.float32)
+    n_valid = np.empty(n_trials, dtype=np.int64)
+
+    for start in range(0, n_trials, chunk_trials):
+        chunk = np.asarray(data[start:start + chunk_trials, :2], dtype=float)
+        x, y = chunk[:, 0], chunk[:, 1]
+        with np.errstate(invalid="ignore"):
+            valid = (x >= 0) & (x <= width) & (y >= 0) & (y <= height)
+            blink = valid & ((y < blink_y[0]) | (y > blink_y[1]))
+        keep = valid & ~_blink_mask(valid, blink, win)
+
+        t = np.broadcast_to(np.arange(len(chunk))[:, None], keep.shape)[keep]
+        # histcounts2: left-closed bins, the last bin also holds the right edge
+        ix = np.minimum(np.searchsorted(x_edges, x[keep], side="right") - 1, nb - 1)
+        iy = np.minimum(np.searchsorted(y_edges, y[keep], side="right") - 1, nb - 1)
+        counts = np.bincount((t * nb + iy) * nb + ix, minlength=len(chunk) * nb * nb)
+        counts = counts.reshape(len(chunk), nb, nb)
+
+        nv = valid.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rate = counts / nv[:, None, None]
+        maps[start:start + len(chunk)] = _gaussian_smooth(rate, smoothing_factor)
+        n_valid[start:start + len(chunk)] = nv
+
+    return GazeHeatmaps(maps, x_edges, y_edges, n_valid)
+
+
+def heatmap_frame(heatmaps, meta=None, value_col="value"):
+    """
+    Long table of heatmap values for the mixed-model helpers: one row per trial and
+    bin with Trial, ybin, xbin (bin indices), x, y (bin centres in px) and value
+    (float32). `meta` (one row per trial, e.g. ID and Condition) is joined by
+    position; categorical columns stay categorical, so the frame stays compact.
+    """
+    maps = heatmaps.maps
+    n_trials, ny, nx = maps.shape
+    per_trial = ny * nx
+    yb, xb = np.divmod(np.arange(per_trial, dtype=np.int32), nx)
+    xc = ((heatmaps.x_edges[:-1] + heatmaps.x_edges[1:]) / 2).astype(np.float32)
+    yc = ((heatmaps.y_edges[:-1] + heatmaps.y_edges[1:]) / 2).astype(np.float32)
+    trial = np.repeat(np.arange(n_trials, dtype=np.int32), per_trial)
+    df = pd.DataFrame({
+        "Trial": trial,
+        "ybin": np.tile(yb.astype(np.int16), n_trials),
+        "xbin": np.tile(xb.astype(np.int16), n_trials),
+        "x": np.tile(xc[xb], n_trials),
+        "y": np.tile(yc[yb], n_trials),
+        value_col: maps.reshape(-1),
+    })
+    if meta is not None:
+        meta = meta.reset_index(drop=True)
+        if len(meta) != n_trials:
+            raise ValueError(f"meta has {len(meta)} rows for {n_trials} trials")
+        df = pd.concat([df, meta.iloc[trial].reset_index(drop=True)], axis=1)
+    return df
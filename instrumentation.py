@@ -0,0 +1,224 @@
+"""
+Opt-in instrumentation of the statistics helpers.
+
+Functions decorated with @instrumented record one entry per call while a Recorder
+is active:
+
+    with instrumentation.record(memory=True) as rec:
+        res = fit_mixedlm("value ~ C(Condition)", df, "ID")
+        export_model_table(res, "table.docx")
+    rec.to_frame()          # or rec.summary(), rec.to_jsonl(path)
+
+Each entry holds the call name, wall and CPU time, nesting depth and parent call,
+the exception type if the call raised, optionally the peak memory allocated during
+the call (tracemalloc, which itself slows Python code down), and any fields the
+function added with annotate() (fits add optimizer, iterations and convergence).
+
+With no recorder active a decorated call costs one global lookup. Calls made in
+worker processes (n_jobs > 1) are recorded there and merged into the active
+recorder when the results come back (see worker_map); they carry the worker's
+process id in a "worker" column, and their memory peaks are those of the worker.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+_recorder = None
+
+
+class Recorder:
+    """Collects call records; see `record()`."""
+
+    def __init__(self, memory=False):
+        self.memory = bool(memory)
+        self.records = []
+        self._stack = []
+        self._t0 = time.perf_counter()
+
+    def _call(self, name, func, args, kwargs):
+        parent = self._stack[-1] if self._stack else None
+        entry = {
+            "id": len(self.records),
+            "name": name,
+            "parent": None if parent is None else parent["id"],
+            "depth": len(self._stack),
+            "start_s": time.perf_counter() - self._t0,
+            "error": None,
+        }
+        self.records.append(entry)
+        self._stack.append(entry)
+        if self.memory:
+            # tracemalloc has a single peak counter: fold it into the parent
+            # before resetting it for this call
+            current, peak = tracemalloc.get_traced_memory()
+            if parent is not None:
+                parent["_peak"] = max(parent["_peak"], peak)
+            tracemalloc.reset_peak()
+            entry["_base"], entry["_peak"] = current, current
+        t0, c0 = time.perf_counter(), time.process_time()
+        try:
+            return func(*args, **kwargs)
+        except BaseException as exc:
+            entry["error"] = type(exc).__name__
+            raise
+        finally:
+            entry["wall_s"] = time.perf_counter() - t0
+            entry["cpu_s"] = time.process_time() - c0
+            if self.memory:
+                peak = max(entry.pop("_peak"), tracemalloc.get_traced_memory()[1])
+                entry["peak_mem_bytes"] = peak - entry.pop("_base")
+                if parent is not None:
+                    parent["_peak"] = max(parent["_peak"], peak)
+            self._stack.pop()
+
+    def merge(self, records, t0=None, worker=None):
+        """
+        Append the records of another Recorder (e.g. made in a worker process) as
+        children of the innermost active call. t0 is that recorder's start time (on
+        the perf_counter clock), used to align start_s.
+        """
+        parent = self._stack[-1] if self._stack else None
+        offset, depth = len(self.records), len(self._stack)
+        shift = 0.0 if t0 is None else t0 - self._t0
+        for r in records:
+            entry = dict(r)
+            entry["id"] = r["id"] + offset
+            if r["parent"] is not None:
+                entry["parent"] = r["parent"] + offset
+            elif parent is not None:
+                entry["parent"] = parent["id"]
+            entry["depth"] = r["depth"] + depth
+            entry["start_s"] = r["start_s"] + shift
+            if worker is not None:
+                entry["worker"] = worker
+            self.records.append(entry)
+
+    def to_frame(self):
+        """One row per call, in call order; annotation fields become columns."""
+        cols = ["id", "name", "parent", "depth", "start_s", "wall_s", "cpu_s"]
+        if self.memory:
+            cols.append("peak_mem_bytes")
+        cols.append("error")
+        df = pd.DataFrame.from_records(self.records)
+        if df.empty:
+            return pd.DataFrame(columns=cols)
+        return df[cols + [c for c in df.columns if c not in cols]]
+
+    def summary(self):
+        """Calls, total/mean/max wall time and total CPU time per function."""
+        df = self.to_frame()
+        out = df.groupby("name", sort=False).agg(
+            calls=("id", "size"),
+            wall_total_s=("wall_s", "sum"),
+            wall_mean_s=("wall_s", "mean"),
+            wall_max_s=("wall_s", "max"),
+            cpu_total_s=("cpu_s", "sum"),
+        )
+        if self.memory:
+            out["peak_mem_max_bytes"] = df.groupby("name", sort=False)["peak_mem_bytes"].max()
+        return out.sort_values("wall_total_s", ascending=False)
+
+    def to_jsonl(self, path):
+        """Write the records as JSON lines (one object per call)."""
+        with open(path, "w", encoding="utf-8") as fh:
+            for entry in self.records:
+                fh.write(json.dumps(entry, default=_json_default) + "\n")
+
+
+def _json_default(x):
+    # numpy scalars and other stray annotation values
+    return x.item() if hasattr(x, "item") else str(x)
+
+
+@contextmanager
+def record(memory=False, recorder=None):
+    """
+    Record instrumented calls made inside the block.
+
+    memory : also record the peak memory allocated during each call (starts
+             tracemalloc for the duration of the block if it is not running)
+    recorder : existing Recorder to append to (e.g. across several blocks)
+    """
+    global _recorder
+    rec = recorder if recorder is not None else Recorder(memory=memory)
+    started = rec.memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    previous, _recorder = _recorder, rec
+    try:
+        yield rec
+    finally:
+        _recorder = previous
+        if started:
+            tracemalloc.stop()
+
+
+def _run_recorded(func, job, memory):
+    # worker side of worker_map
+    with record(memory=memory) as rec:
+        result = func(job)
+    return result, rec.records, rec._t0, os.getpid()
+
+
+def worker_map(executor, func, jobs):
+    """
+    list(executor.map(func, jobs)); while a recorder is active, the instrumented
+    calls made by func in the worker processes are merged into it.
+    """
+    rec = _recorder
+    if rec is None:
+        return list(executor.map(func, jobs))
+    jobs = list(jobs)
+    out = []
+    for result, records, t0, pid in executor.map(_run_recorded, [func] * len(jobs), jobs,
+                                                 [rec.memory] * len(jobs)):
+        rec.merge(records, t0=t0, worker=pid)
+        out.append(result)
+    return out
+
+
+def enabled():
+    return _recorder is not None
+
+
+def annotate(**fields):
+    """Attach fields (e.g. fit diagnostics) to the innermost recorded call."""
+    rec = _recorder
+    if rec is not None and rec._stack:
+        rec._stack[-1].update(fields)
+
+
+def instrumented(func=None, *, name=None):
+    """Decorator registering a function for recording (name defaults to module.qualname)."""
+    def wrap(f):
+        label = name or f"{f.__module__}.{f.__qualname__}"
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            rec = _recorder
+            if rec is None:
+                return f(*args, **kwargs)
+            return rec._call(label, f, args, kwargs)
+        return wrapper
+    return wrap if func is None else wrap(func)
+
+
+def fit_diagnostics(res):
+    """Convergence flag and iteration count of a fitted model, where available."""
+    out = {"converged": getattr(res, "converged", None)}
+    n_iter = getattr(res, "n_iter", None)
+    hist = getattr(res, "hist", None)
+    if n_iter is None and hist:
+        # statsmodels MixedLM with full_output=True: retvals of the last optimizer run
+        last = hist[-1]
+        n_iter = last.get("iterations", last.get("fcalls"))
+    out["iterations"] = n_iter
+    return out
@@ -0,0 +1,405 @@
+"""
+Fast solver for random-intercept linear mixed models, y ~ X + (1|group).
+
+The data are reduced once to per-group sufficient statistics (group sizes, group
+sums of X and y, and the pooled cross-products X'X, X'y, y'y). With the variance
+ratio g = var(group) / var(residual), V_i^-1 = I - c_i 11' with c_i = g / (1 + n_i g),
+so for every g the GLS estimate, profiled residual variance and log-likelihood
+follow from O(G·p²) operations. The likelihood is profiled over the single ratio g
+and maximized as a 1-D problem. Because the statistics are sums, rows of new
+subjects can be merged into an existing fit and re-optimized from the previous
+estimate without touching the old rows (update_random_intercept).
+
+Results use the statsmodels MixedLM parameterization (fixed effects followed by
+"Group Var" = g, scale = residual variance, cov_re = scale·g), so they can be used
+wherever a MixedLMResults is read (drop1_lrt, the contrast functions,
+mixedlm_fixed_effects_to_df, export_model_table).
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from formula_utils import formula_columns
+
+
+class RandomInterceptStats:
+    """
+    Per-group sufficient statistics of a random-intercept design.
+
+    All statistics are sums over rows, so the statistics of new rows can be merged
+    in without revisiting the old ones (see `merge`). `levels` records the
+    categories of the categorical columns the design was built with, so that new
+    rows are coded with the same dummy columns.
+    """
+
+    def __init__(self, n, S, u, XtX, Xty, yty, group_labels, exog_names, endog_name="y",
+                 levels=None):
+        self.n = np.asarray(n, dtype=float)       # (G,) group sizes
+        self.S = np.asarray(S, dtype=float)       # (G, p) group sums of X
+        self.u = np.asarray(u, dtype=float)       # (G,) group sums of y
+        self.XtX = np.asarray(XtX, dtype=float)   # (p, p)
+        self.Xty = np.asarray(Xty, dtype=float)   # (p,)
+        self.yty = float(yty)
+        self.group_labels = list(group_labels)
+        self.exog_names = list(exog_names)
+        self.endog_name = endog_name
+        self.levels = dict(levels or {})
+
+    @property
+    def nobs(self):
+        return float(self.n.sum())
+
+    @classmethod
+    def from_arrays(cls, endog, exog, groups, exog_names=None, endog_name="y"):
+        y = np.asarray(endog, dtype=float)
+        X = np.asarray(exog, dtype=float)
+        codes, labels = pd.factorize(np.asarray(groups), sort=False)
+        G = len(labels)
+        n = np.bincount(codes, minlength=G)
+        S = np.column_stack([np.bincount(codes, weights=X[:, j], minlength=G) for j in range(X.shape[1])])
+        u = np.bincount(codes, weights=y, minlength=G)
+        if exog_names is None:
+            exog_names = [f"x{j}" for j in range(X.shape[1])]
+        return cls(n, S, u, X.T @ X, X.T @ y, y @ y, labels, exog_names, endog_name)
+
+    def merge(self, other):
+        """
+        Statistics of the union of both row sets. Groups of `other` that already
+        exist (more trials of a known subject) are added to them, new groups are
+        appended; cost is O(groups · p), independent of the number of rows.
+        """
+        if list(other.exog_names) != self.exog_names:
+            raise ValueError(f"Design columns differ: {other.exog_names} vs {self.exog_names}")
+        pos = {lab: i for i, lab in enumerate(self.group_labels)}
+        idx = np.array([pos.get(lab, -1) for lab in other.group_labels], dtype=np.int64)
+        old, new = idx >= 0, idx < 0
+
+        n, S, u = self.n.copy(), self.S.copy(), self.u.copy()
+        np.add.at(n, idx[old], other.n[old])
+        np.add.at(S, idx[old], other.S[old])
+        np.add.at(u, idx[old], other.u[old])
+        labels = self.group_labels + [lab for lab, is_new in zip(other.group_labels, new) if is_new]
+        return RandomInterceptStats(
+            np.concatenate([n, other.n[new]]), np.vstack([S, other.S[new]]),
+            np.concatenate([u, other.u[new]]), self.XtX + other.XtX, self.Xty + other.Xty,
+            self.yty + other.yty, labels, self.exog_names, self.endog_name, self.levels,
+        )
+
+
+def _profile(st, g, reml):
+    """GLS estimate and profiled log-likelihood at variance ratio g."""
+    n = st.n
+    c = g / (1.0 + n * g)
+    M = st.XtX - st.S.T @ (c[:, None] * st.S)
+    r = st.Xty - st.S.T @ (c * st.u)
+    beta = np.linalg.solve(M, r)
+    Q = st.yty - np.sum(c * st.u**2) - beta @ r
+    N = st.nobs
+    fac = N - len(beta) if reml else N
+    llf = -0.5 * fac * (np.log(2.0 * np.pi) + 1.0 + np.log(Q / fac)) - 0.5 * np.sum(np.log1p(n * g))
+    if reml:
+        llf -= 0.5 * np.linalg.slogdet(M)[1]
+    return beta, Q, M, llf
+
+
+def _hessian(st, beta, g, Q, M, reml):
+    """Analytic Hessian of the log-likelihood in (fixed effects, g), scale profiled."""
+    n = st.n
+    fac = st.nobs - len(beta) if reml else st.nobs
+    d = 1.0 + n * g
+    e = st.u - st.S @ beta                       # group sums of residuals
+    c1 = 1.0 / d**2                              # dc/dg
+    B = np.sum(c1 * e**2)
+    D = 2.0 * np.sum(n * e**2 / d**3)
+
+    h_fe = -fac * M / Q
+    h_fere = -fac * (st.S.T @ (c1 * e)) / Q
+    h_re = 0.5 * np.sum(n**2 / d**2) - 0.5 * fac * (D / Q - B**2 / Q**2)
+    if reml:
+        P = st.S.T @ (c1[:, None] * st.S)
+        F = 2.0 * st.S.T @ ((n / d**3)[:, None] * st.S)
+        MP = np.linalg.solve(M, P)
+        h_re += 0.5 * (np.sum(MP * MP.T) - np.trace(np.linalg.solve(M, F)))
+
+    k = len(beta)
+    H = np.empty((k + 1, k + 1))
+    H[:k, :k] = h_fe
+    H[:k, k] = H[k, :k] = h_fere
+    H[k, k] = h_re
+    return H
+
+
+class RandomInterceptResults:
+    """Fit results exposing the subset of the MixedLMResults interface used by the helpers."""
+
+    def __init__(self, stats, beta, g, Q, H, llf, reml, converged, formula=None, n_iter=None):
+        names = stats.exog_names + ["Group Var"]
+        self.stats = stats              # kept for incremental updates (update_random_intercept)
+        fac = stats.nobs - len(beta) if reml else stats.nobs
+        self.scale = float(Q / fac)
+        self.params = pd.Series(np.append(beta, g), index=names)
+        self.fe_params = self.params.iloc[:-1]
+        self.cov_re_unscaled = np.array([[g]])
+        self.cov_re = pd.DataFrame([[self.scale * g]], index=["Group"], columns=["Group"])
+        self.llf = float(llf)
+        self.reml = reml
+        self.method = "REML" if reml else "ML"
+        self.converged = converged
+        self.n_iter = n_iter            # likelihood evaluations of the 1-D search
+        self.k_fe = len(beta)
+        self.k_re = 1
+        self.df_modelwc = self.k_fe + 1
+        self.nobs = stats.nobs
+        self.n_groups = len(stats.group_labels)
+        self.formula = formula
+        self.endog_names = stats.endog_name
+        self.exog_names = stats.exog_names
+        self.exog_re_names = ["Group"]
+        self._cov = pd.DataFrame(np.linalg.pinv(-H), index=names, columns=names)
+
+    def cov_params(self):
+        return self._cov
+
+    @property
+    def bse(self):
+        return pd.Series(np.sqrt(np.diag(self._cov)), index=self.params.index)
+
+    @property
+    def bse_fe(self):
+        return self.bse.iloc[: self.k_fe]
+
+    @property
+    def tvalues(self):
+        return self.params / self.bse
+
+    @property
+    def pvalues(self):
+        from scipy.stats import norm
+
+        return pd.Series(2.0 * norm.sf(np.abs(self.tvalues)), index=self.params.index)
+
+    def conf_int(self, alpha=0.05):
+        from scipy.stats import norm
+
+        q = norm.ppf(1.0 - alpha / 2.0)
+        return pd.DataFrame({0: self.params - q * self.bse, 1: self.params + q * self.bse})
+
+
+def _optimize_ratio(stats, reml, start=None, xatol=1e-10):
+    """Maximize the profile log-likelihood over g = t**2 >= 0; returns (g, llf, success, nfev)."""
+    from scipy.optimize import minimize_scalar
+
+    def negll(t):
+        return -_profile(stats, t * t, reml)[3]
+
+    # warm start: bracket the search around the previous optimum
+    hi = 10.0 if not start else 4.0 * np.sqrt(start)
+    nfev = 1
+    for _ in range(20):
+        opt = minimize_scalar(negll, bounds=(0.0, hi), method="bounded", options={"xatol": xatol})
+        nfev += opt.nfev
+        if opt.x < 0.9 * hi:
+            break
+        hi *= 10.0
+    t, fun = float(opt.x), float(opt.fun)
+    # the bounded search never lands exactly on 0: compare with the boundary
+    f0 = negll(0.0)
+    if f0 <= fun:
+        t, fun = 0.0, f0
+    return t * t, -fun, bool(opt.success), nfev
+
+
+def fit_random_intercept(stats, reml=False, start=None, xatol=1e-10, formula=None):
+    """
+    Maximize the profile likelihood of a random-intercept model over g >= 0.
+
+    start : optional previous estimate of g; the search bracket is built around it
+            (used for warm starts).
+    """
+    g, _, success, nfev = _optimize_ratio(stats, reml, start=start, xatol=xatol)
+    beta, Q, M, llf = _profile(stats, g, reml)
+    H = _hessian(stats, beta, g, Q, M, reml)
+    return RandomInterceptResults(stats, beta, g, Q, H, llf, reml, success, formula=formula, n_iter=nfev)
+
+
+def batch_llf(Y, X, codes, reml=False, start=None, xatol=1e-8):
+    """
+    Maximized log-likelihoods of y ~ X + (1|group) for every column of Y (N × B).
+
+    Everything that depends only on X and the grouping (group sizes, group sums of
+    X, X'X) is computed once; the response-dependent statistics of all columns come
+    from three matrix products.
+    """
+    from scipy.sparse import csr_matrix
+
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    G = int(codes.max()) + 1
+    Z = csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(G, len(codes)))
+    base = RandomInterceptStats(np.bincount(codes, minlength=G), Z @ X, np.zeros(G), X.T @ X,
+                                np.zeros(X.shape[1]), 0.0, range(G), range(X.shape[1]))
+    U = Z @ Y
+    XtY = X.T @ Y
+    yty = np.einsum("ij,ij->j", Y, Y)
+
+    out = np.empty(Y.shape[1])
+    for b in range(Y.shape[1]):
+        base.u, base.Xty, base.yty = U[:, b], XtY[:, b], float(yty[b])
+        out[b] = _optimize_ratio(base, reml, start=start, xatol=xatol)[1]
+    return out
+
+
+def multi_response_stats(Y, X, groups, exog_names, endog_names):
+    """
+    RandomInterceptStats of y ~ X + (1|group) for every column of Y (N × B).
+
+    The statistics that depend only on X and the grouping (group sizes, group sums
+    of X, X'X) are computed once and shared by all responses; the response parts
+    come from three matrix products. Rows where a response is missing are removed
+    from its statistics by subtracting their (few) contributions, so each entry
+    equals the statistics of a separate fit on that response's complete rows.
+    """
+    from scipy.sparse import csr_matrix
+
+    Y = np.asarray(Y, dtype=float)
+    X = np.asarray(X, dtype=float)
+    codes, labels = pd.factorize(np.asarray(groups), sort=False)
+    G = len(labels)
+    Z = csr_matrix((np.ones(len(codes)), (codes, np.arange(len(codes)))), shape=(G, len(codes)))
+    n = np.bincount(codes, minlength=G).astype(float)
+    S = np.asarray(Z @ X)
+    XtX = X.T @ X
+
+    missing = np.isnan(Y)
+    Y0 = np.where(missing, 0.0, Y)
+    U = np.asarray(Z @ Y0)
+    XtY = X.T @ Y0
+    yty = np.einsum("ij,ij->j", Y0, Y0)
+
+    out = []
+    for b, name in enumerate(endog_names):
+        m = np.flatnonzero(missing[:, b])
+        if not len(m):
+            out.append(RandomInterceptStats(n, S, U[:, b], XtX, XtY[:, b], yty[b], labels, exog_names,
+                                            endog_name=name))
+            continue
+        Xm = X[m]
+        nb = n - np.bincount(codes[m], minlength=G)
+        Sb = S.copy()
+        np.subtract.at(Sb, codes[m], Xm)
+        keep = nb > 0                               # groups without any complete row drop out
+        out.append(RandomInterceptStats(
+            nb[keep], Sb[keep], U[keep, b], XtX - Xm.T @ Xm, XtY[:, b], yty[b],
+            [lab for lab, k in zip(labels, keep) if k], exog_names, endog_name=name,
+        ))
+    return out
+
+
+def _categorical(values, col, levels):
+    """Code values with known categories; unseen values are an error, not NaN."""
+    values = pd.Series(values)
+    ordered = isinstance(values.dtype, pd.CategoricalDtype) and values.dtype.ordered
+    cat = pd.Categorical(values, categories=levels[col], ordered=ordered)
+    unseen = (cat.codes < 0) & values.notna().to_numpy()
+    if unseen.any():
+        raise ValueError(f"Column '{col}' has levels not in the original fit: "
+                         f"{sorted(set(values[unseen]), key=str)}")
+    return cat
+
+
+def one_factor_stats(df, value_col, group_col, id_col, levels=None):
+    """
+    RandomInterceptStats for value ~ C(group) + (1|id) straight from category codes,
+    without building a design matrix (treatment coding, first category as baseline).
+    levels : {group_col: categories} of an earlier fit, to code new rows identically.
+    """
+    if levels and group_col in levels:
+        lev = _categorical(df[group_col], group_col, levels)
+    else:
+        lev = pd.Categorical(df[group_col])
+    y = df[value_col].to_numpy(dtype=float)
+    ok = ~np.isnan(y) & (lev.codes >= 0)
+    ids, labels = pd.factorize(df[id_col].to_numpy()[ok], sort=False)
+    lc = lev.codes[ok].astype(np.int64)
+    y = y[ok]
+
+    G, k = len(labels), len(lev.categories)
+    counts = np.bincount(ids * k + lc, minlength=G * k).reshape(G, k).astype(float)
+    n = counts.sum(axis=1)
+    S = np.column_stack([n, counts[:, 1:]])
+    tot = counts.sum(axis=0)
+    XtX = np.diag(np.append(tot.sum(), tot[1:]))
+    XtX[0, 1:] = XtX[1:, 0] = tot[1:]
+    ysum = np.bincount(lc, weights=y, minlength=k)
+    Xty = np.append(y.sum(), ysum[1:])
+    names = ["Intercept"] + [f"C({group_col})[T.{c}]" for c in lev.categories[1:]]
+    return RandomInterceptStats(n, S, np.bincount(ids, weights=y, minlength=G), XtX, Xty, y @ y,
+                                labels, names, endog_name=value_col,
+                                levels={group_col: list(lev.categories)})
+
+
+def random_intercept_stats(formula, data, group, levels=None, design=None):
+    """
+    Build RandomInterceptStats for a patsy formula (rows with missing values dropped).
+
+    levels : {column: categories} of an earlier fit (RandomInterceptStats.levels);
+             those columns are coded with the same categories, so new rows get the
+             same dummy columns and reference levels.
+    design : DesignCache to take the design matrix from (not used with `levels`)
+    """
+    from patsy import dmatrices
+
+    if design is not None and not levels:
+        y, X, groups, lev = design.model_matrices(formula, data, group)
+        stats = RandomInterceptStats.from_arrays(y.to_numpy(), X.to_numpy(), groups,
+                                                 exog_names=list(X.columns), endog_name=y.name)
+        stats.levels = dict(lev)
+        return stats
+
+    # patsy sniffs object columns element by element; categoricals take a fast path
+    cols = formula_columns(formula, data.columns)
+    # a unique index keeps the group lookup below aligned (e.g. for concatenated frames)
+    data = data[list(dict.fromkeys(cols + [group]))].reset_index(drop=True)
+    levels = dict(levels or {})
+    for col in cols:
+        if col in levels:
+            data[col] = _categorical(data[col], col, levels)
+        elif data[col].dtype == object:
+            data[col] = pd.Categorical(data[col])
+        if isinstance(data[col].dtype, pd.CategoricalDtype):
+            levels[col] = list(data[col].cat.categories)
+
+    y, X = dmatrices(formula, data, return_type="dataframe", NA_action="drop")
+    groups = data.loc[X.index, group]
+    stats = RandomInterceptStats.from_arrays(
+        y.iloc[:, 0].to_numpy(), X.to_numpy(), groups.to_numpy(),
+        exog_names=list(X.columns), endog_name=y.columns[0],
+    )
+    stats.levels = levels
+    return stats
+
+
+def fit_random_intercept_formula(formula, data, group, reml=False, design=None):
+    """Fit formula + (1|group) with the fast solver."""
+    return fit_random_intercept(random_intercept_stats(formula, data, group, design=design),
+                                reml=reml, formula=formula)
+
+
+def update_random_intercept(res, new_stats, xatol=1e-10):
+    """
+    Refit after adding rows: merge the statistics of the new rows into those kept
+    on `res` and re-optimize starting from the previous variance ratio. Equal to a
+    full refit on all rows (up to the optimizer tolerance).
+    """
+    stats = res.stats.merge(new_stats)
+    g = float(res.params.iloc[-1])
+    return fit_random_intercept(stats, reml=res.reml, start=g if g > 0 else None, xatol=xatol,
+                                formula=res.formula)
+
+
+def update_random_intercept_formula(res, new_data, group):
+    """update_random_intercept for new rows of a formula fit (fit_random_intercept_formula)."""
+    new_stats = random_intercept_stats(res.formula, new_data, group, levels=res.stats.levels)
+    return update_random_intercept(res, new_stats)
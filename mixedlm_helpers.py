@@ -1,16 +1,248 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from types import SimpleNamespace
+
 import numpy as np
 import pandas as pd
-from scipy.stats import chi2, norm
-import statsmodels.formula.api as smf
-from statsmodels.stats.multitest import multipletests
 
-def fit_mixedlm(formula, data, group, reml=False, method="lbfgs", maxiter=500):
-    m = smf.mixedlm(formula, data=data, groups=data[group], re_formula="1")
-    res = m.fit(reml=reml, method=method, maxiter=maxiter, disp=False)
+from contrasts import level_contrasts
+from design_cache import resolve_design_cache
+from fit_cache import resolve_cache
+from fit_summary import summarize
+from formula_utils import formula_columns
+from instrumentation import annotate, enabled, fit_diagnostics, instrumented, worker_map
+from lmm_solver import (
+    batch_llf,
+    fit_random_intercept,
+    fit_random_intercept_formula,
+    multi_response_stats,
+    update_random_intercept_formula,
+)
+
+def mixedlm_from_matrices(formula, endog, exog, groups):
+    """
+    statsmodels MixedLM for endog ~ exog + (1|groups) that is indistinguishable from
+    smf.mixedlm(formula, data, groups=..., re_formula="1") (parameter and random
+    effect names, model.formula), built from already evaluated design matrices.
+    """
+    from statsmodels.regression.mixed_linear_model import MixedLM
+
+    model = MixedLM(endog, exog, np.asarray(groups), exog_re=np.ones((len(endog), 1)))
+    param_names, re_names, re_names_full = model._make_param_names(["Group"])
+    model.data.param_names = param_names
+    model.data.exog_re_names = re_names
+    model.data.exog_re_names_full = re_names_full
+    model.formula = formula
+    return model
+
+
+def _mixedlm_model(formula, data, group, design=None):
+    design = resolve_design_cache(design)
+    if design is None:
+        import statsmodels.formula.api as smf
+
+        # patsy drops rows with missing values but the groups array would keep them
+        cols = formula_columns(formula, data.columns)
+        cols += [group] if group not in cols else []
+        if data[cols].isna().to_numpy().any():
+            data = data[cols].dropna()
+        return smf.mixedlm(formula, data=data, groups=data[group], re_formula="1")
+    return mixedlm_from_matrices(formula, *design.model_matrices(formula, data, group)[:3])
+
+
+@instrumented
+def fit_mixedlm(formula, data, group, reml=False, method="lbfgs", maxiter=500, cache=None,
+                start_params=None, solver="statsmodels", previous=None, fallback=None, timeout=None,
+                design=None):
+    # cache: FitCache, or True for the process-wide default (see fit_cache.py)
+    # start_params: warm start for the covariance parameters (e.g. from a larger model)
+    # solver="fast": profiled random-intercept solver from lmm_solver.py (method,
+    #   maxiter and start_params only apply to statsmodels)
+    # previous: fast-solver fit of this formula on earlier data; `data` then holds only
+    #   the new rows (e.g. newly recorded subjects), whose sufficient statistics are
+    #   merged into the stored ones and the fit is re-optimized from the previous
+    #   variance estimate (same result as refitting on all rows; the cache is not used)
+    # fallback / timeout: fit with fit_mixedlm_robust (optimizer chain, True for
+    #   DEFAULT_FALLBACK, with a wall-clock budget in seconds); replaces `method`
+    # design: DesignCache, or True for the process-wide one (see design_cache.py); the
+    #   design matrix is shared with other fits of the same predictors on this frame
+    #   (other DVs, reduced models) instead of being rebuilt by patsy; the rows are
+    #   always the complete cases of this formula's variables
+    if previous is not None:
+        if solver != "fast":
+            raise ValueError("Incremental updates (previous=...) need solver='fast'")
+        if previous.formula != formula or previous.reml != reml:
+            raise ValueError("previous was fitted with a different formula or reml setting")
+        res = update_random_intercept_formula(previous, data, group)
+        if enabled():
+            annotate(solver=solver, optimizer="bounded-brent", incremental=True, **fit_diagnostics(res))
+        return res
+    cache = resolve_cache(cache)
+    if cache is not None:
+        # warm starts can end at a different optimum; a shared design is keyed too
+        opts = {"reml": reml, "method": method, "maxiter": maxiter, "solver": solver,
+                "fallback": fallback, "timeout": timeout,
+                "start_params": None if start_params is None
+                else tuple(np.asarray(start_params, dtype=float).ravel().tolist()),
+                "design": resolve_design_cache(design) is not None}
+        cols = formula_columns(formula, data.columns) + [group]
+        key = cache.key("fit_mixedlm", formula, group, opts, data, cols)
+        hits = cache.hits
+        res = cache.get_or_fit(
+            key, lambda: fit_mixedlm(formula, data, group, reml, method, maxiter,
+                                     start_params=start_params, solver=solver,
+                                     fallback=fallback, timeout=timeout, design=design)
+        )
+        annotate(cache_hit=cache.hits > hits)
+        return res
+    if solver == "fast":
+        res = fit_random_intercept_formula(formula, data, group, reml=reml,
+                                           design=resolve_design_cache(design))
+        if enabled():
+            annotate(solver=solver, optimizer="bounded-brent", **fit_diagnostics(res))
+        return res
+    if solver != "statsmodels":
+        raise ValueError(f"Unknown solver: {solver}")
+    if fallback is not None or timeout is not None:
+        chain = DEFAULT_FALLBACK if fallback is None or fallback is True else tuple(fallback)
+        res = fit_mixedlm_robust(formula, data, group, reml=reml, fallback=chain, maxiter=maxiter,
+                                 timeout=timeout, start_params=start_params, design=design)
+        if enabled():
+            annotate(solver=solver, optimizer=res.fit_optimizer, attempts=len(res.fit_attempts),
+                     **fit_diagnostics(res))
+        return res
+    m = _mixedlm_model(formula, data, group, design)
+    # full_output keeps the optimizer's return values (iteration counts) while recording
+    res = m.fit(reml=reml, method=method, maxiter=maxiter, disp=False, start_params=start_params,
+                full_output=enabled())
+    if enabled():
+        optimizer = method if isinstance(method, str) else "/".join(method or ["bfgs", "lbfgs", "cg"])
+        annotate(solver=solver, optimizer=optimizer, **fit_diagnostics(res))
     return res
 
-def drop1_lrt(full_res, reduced_res):
-    # Likelihood-ratio test comparing nested mixed models (full vs reduced)
+DEFAULT_FALLBACK = ("lbfgs", "bfgs", "powell", "nm")
+
+
+class _FitTimeout(Exception):
+    pass
+
+
+def _fit_problems(res, caught):
+    """Reasons to reject a MixedLM fit (empty list: accept)."""
+    problems = []
+    if not getattr(res, "converged", False):
+        problems.append("not converged")
+    if not np.isfinite(res.llf):
+        problems.append("non-finite log-likelihood")
+    with np.errstate(invalid="ignore"):
+        if not np.all(np.isfinite(np.asarray(res.bse_fe, dtype=float))):
+            problems.append("singular Hessian")
+    if any("not positive definite" in str(w.message) for w in caught) and "singular Hessian" not in problems:
+        problems.append("singular Hessian")
+    return problems
+
+
+def fit_mixedlm_robust(formula, data, group, reml=False, fallback=DEFAULT_FALLBACK, maxiter=500,
+                       timeout=None, start_params=None, design=None):
+    """
+    Fit formula + (1|group) trying a chain of optimizers until one gives an
+    acceptable fit (converged, finite log-likelihood, finite fixed-effect SEs /
+    positive definite Hessian).
+
+    fallback : optimizers tried in order (statsmodels names, e.g. "lbfgs", "bfgs",
+               "powell", "nm", "cg"); every retry is warm-started from the covariance
+               parameters of the best attempt so far (highest finite llf, or the last
+               iterate of an attempt that ran out of time)
+    timeout  : wall-clock budget in seconds for the whole chain, checked at every
+               optimizer iteration; an attempt that exceeds it is abandoned
+    start_params : starting covariance parameters for the first attempt
+    design : DesignCache (or True) to take the design matrix from (see fit_mixedlm)
+
+    The result carries `fit_attempts` (optimizer, seconds, llf, converged, problems,
+    warnings per attempt) and `fit_optimizer` (the accepted attempt's optimizer, or
+    None). If no attempt is acceptable the best finite one is returned with a
+    ConvergenceWarning; if none produced a result at all, RuntimeError is raised.
+    """
+    import warnings
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+    deadline = None if timeout is None else time.perf_counter() + float(timeout)
+    model = _mixedlm_model(formula, data, group, design)
+    attempts, best, start = [], None, start_params
+
+    for optimizer in fallback:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        last = [None]
+
+        def callback(xk, *args):
+            last[0] = np.array(xk, copy=True)
+            if deadline is not None and time.perf_counter() > deadline:
+                raise _FitTimeout
+
+        info = {"optimizer": optimizer, "seconds": np.nan, "llf": np.nan, "converged": False,
+                "problems": [], "warnings": []}
+        t0 = time.perf_counter()
+        res = None
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            try:
+                res = model.fit(reml=reml, method=optimizer, maxiter=maxiter, disp=False,
+                                start_params=start, callback=callback)
+            except _FitTimeout:
+                info["problems"] = ["timeout"]
+            except Exception as exc:
+                info["problems"] = [f"{type(exc).__name__}: {exc}"]
+        info["seconds"] = time.perf_counter() - t0
+        info["warnings"] = sorted({str(w.message) for w in caught if "callback" not in str(w.message)})
+
+        if res is not None:
+            info["llf"] = float(res.llf)
+            info["converged"] = bool(res.converged)
+            info["problems"] = _fit_problems(res, caught)
+            if np.isfinite(res.llf) and (best is None or res.llf > best.llf):
+                best = res
+        attempts.append(info)
+        if res is not None and not info["problems"]:
+            res.fit_attempts, res.fit_optimizer = attempts, optimizer
+            return res
+
+        # warm start for the next optimizer
+        if best is not None:
+            start = best.params_object.get_packed(use_sqrt=model.use_sqrt, has_fe=False)
+        elif info["problems"] == ["timeout"] and last[0] is not None and np.all(np.isfinite(last[0])):
+            start = last[0]
+
+    if best is None:
+        why = "; ".join(f"{a['optimizer']}: {', '.join(a['problems'])}" for a in attempts)
+        raise RuntimeError(f"MixedLM fit failed for {formula!r}: "
+                           + (why or f"time budget of {timeout} s used up before the first attempt"))
+    warnings.warn(f"No optimizer gave an acceptable fit for {formula!r}; returning the best attempt "
+                  f"(llf={best.llf:.4f})", ConvergenceWarning)
+    best.fit_attempts, best.fit_optimizer = attempts, None
+    return best
+
+
+@instrumented
+def drop1_lrt(full_res, reduced_res, method="chi2", n_boot=1000, n_jobs=None, seed=None,
+              batch_size=None, mc_se_target=None, progress=None):
+    """
+    Likelihood-ratio test comparing nested mixed models (full vs reduced).
+
+    method="chi2" uses the asymptotic chi-square reference distribution.
+    method="bootstrap" runs a parametric bootstrap (random-intercept models fitted
+    with fit_mixedlm): responses are simulated from the reduced fit in vectorized
+    batches, both models are refitted on a process pool with the profiled solver
+    (warm-started from the original variance ratios), and p is the Monte Carlo
+    p-value (1 + #{LR* >= LR}) / (1 + n). Batches use independent seeds spawned from
+    `seed`. Sampling stops early after the first batch (in seed order) at which the
+    Monte Carlo standard error of p drops below `mc_se_target`, so results depend on
+    seed and batch_size but not on n_jobs; `progress` is called with a dict (n_boot,
+    p, mc_se, elapsed) after every batch. The chi-square p is kept as p_chi2.
+    """
+    from scipy.stats import chi2
+
     ll_full = float(getattr(full_res, "llf", np.nan))
     ll_red  = float(getattr(reduced_res, "llf", np.nan))
     df_full = int(getattr(full_res, "df_modelwc", np.nan))
@@ -18,85 +250,186 @@ def drop1_lrt(full_res, reduced_res):
     df_diff = df_full - df_red
     LR = 2.0 * (ll_full - ll_red)
     p  = 1.0 - chi2.cdf(LR, df=df_diff if df_diff > 0 else 1)
-    return {"LL_full": ll_full, "LL_reduced": ll_red, "df_full": df_full, "df_reduced": df_red,
-            "df_diff": df_diff, "LR": LR, "p": p}
+    out = {"LL_full": ll_full, "LL_reduced": ll_red, "df_full": df_full, "df_reduced": df_red,
+           "df_diff": df_diff, "LR": LR, "p": p}
+    if method == "chi2":
+        return out
+    if method != "bootstrap":
+        raise ValueError(f"Unknown method: {method}")
+    boot = _bootstrap_lrt(full_res, reduced_res, n_boot, n_jobs, seed, batch_size, mc_se_target, progress)
+    out["p_chi2"] = p
+    out.update(boot)
+    annotate(n_boot=boot["n_boot"])
+    return out
 
-def pairwise_condition_contrasts_at_mean_gaze(res, condition_levels, design_prefix="C(Condition)"):
+_BOOT = {}
+
+def _random_intercept_design(res):
+    model = getattr(res, "model", None)
+    if model is None or getattr(model, "k_re", 0) != 1 or getattr(model, "k_vc", 0) != 0:
+        raise ValueError("method='bootstrap' needs random-intercept MixedLM results from the statsmodels "
+                         "solver (fast-solver results and FitSummary objects do not keep the data)")
+    return np.asarray(model.exog, dtype=float)
+
+def _bootstrap_init(design):
+    _BOOT.clear()
+    _BOOT.update(design)
+
+def _bootstrap_worker(job):
+    d = _BOOT
+    rng = np.random.default_rng(job["seed"])
+    codes, B = d["codes"], job["size"]
+    n_groups = int(codes.max()) + 1
+    Y = (d["mu"][:, None]
+         + d["re_sd"] * rng.standard_normal((n_groups, B))[codes]
+         + d["resid_sd"] * rng.standard_normal((len(codes), B)))
+    ll_full = batch_llf(Y, d["X_full"], codes, d["reml"], start=d["g_full"], xatol=1e-8)
+    ll_red = batch_llf(Y, d["X_red"], codes, d["reml"], start=d["g_red"], xatol=1e-8)
+    return 2.0 * (ll_full - ll_red)
+
+def _bootstrap_lrt(full_res, reduced_res, n_boot, n_jobs, seed, batch_size, mc_se_target, progress):
+    t0 = time.perf_counter()
+    X_full = _random_intercept_design(full_res)
+    X_red = _random_intercept_design(reduced_res)
+    if X_full.shape[0] != X_red.shape[0]:
+        raise ValueError("Full and reduced models were fitted on different rows")
+    codes = pd.factorize(np.asarray(full_res.model.groups))[0]
+    reml = bool(getattr(full_res, "reml", False))
+
+    # observed LR recomputed with the same solver as the bootstrap replicates
+    y = np.asarray(full_res.model.endog, dtype=float)[:, None]
+    g_full = float(np.asarray(full_res.cov_re_unscaled)[0, 0])
+    g_red = float(np.asarray(reduced_res.cov_re_unscaled)[0, 0])
+    LR_obs = float(2.0 * (batch_llf(y, X_full, codes, reml, start=g_full)
+                          - batch_llf(y, X_red, codes, reml, start=g_red))[0])
+
+    design = {
+        "codes": codes, "X_full": X_full, "X_red": X_red, "reml": reml,
+        "g_full": g_full, "g_red": g_red,
+        "mu": X_red @ np.asarray(reduced_res.fe_params, dtype=float),
+        "re_sd": float(np.sqrt(np.asarray(reduced_res.cov_re)[0, 0])),
+        "resid_sd": float(np.sqrt(reduced_res.scale)),
+    }
+    if batch_size is None:
+        batch_size = max(1, min(200, 2_000_000 // len(codes)))
+    sizes = [min(batch_size, n_boot - i) for i in range(0, n_boot, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [{"seed": s, "size": b} for s, b in zip(seeds, sizes)]
+
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(1, min(int(n_jobs), len(jobs)))
+    ex = None
+    if n_jobs > 1:
+        ex = ProcessPoolExecutor(max_workers=n_jobs, initializer=_bootstrap_init, initargs=(design,))
+    else:
+        _bootstrap_init(design)
+
+    # the stopping rule is checked after every batch in seed order, and batches of a
+    # round computed past the stopping point are discarded, so the result depends on
+    # seed and batch_size but not on n_jobs
+    exceed, done, p_boot, mc_se = 0, 0, np.nan, np.nan
+    stop = False
+    try:
+        for start in range(0, len(jobs), n_jobs):
+            chunk = jobs[start:start + n_jobs]
+            for lr in (ex.map(_bootstrap_worker, chunk) if ex else map(_bootstrap_worker, chunk)):
+                exceed += int(np.sum(lr >= LR_obs))
+                done += len(lr)
+                p_boot = (exceed + 1.0) / (done + 1.0)
+                mc_se = float(np.sqrt(p_boot * (1.0 - p_boot) / done))
+                if progress is not None:
+                    progress({"n_boot": done, "p": p_boot, "mc_se": mc_se,
+                              "elapsed": time.perf_counter() - t0})
+                if mc_se_target is not None and mc_se < mc_se_target:
+                    stop = True
+                    break
+            if stop:
+                break
+    finally:
+        if ex is not None:
+            ex.shutdown()
+        _BOOT.clear()
+
+    return {"p": p_boot, "LR_boot_obs": LR_obs, "n_boot": done, "mc_se": mc_se,
+            "boot_seconds": time.perf_counter() - t0, "method": "bootstrap"}
+
+@instrumented
+def pairwise_condition_contrasts_at_mean_gaze(res, condition_levels, design_prefix="C(Condition)",
+                                               contrasts="pairwise", control=None, p_adjust="fdr_bh"):
     """
     For a MixedLM with formula: AlphaPower ~ Gaze_c * C(Condition) + (1|ID),
     if Gaze_c is mean-centred, then contrasts across Condition at Gaze_c=0
     depend only on the Condition main-effect dummies.
     We compute estimates, SE, z, p, 95% CI, and Benjamini–Hochberg FDR–adjusted p.
+
+    All contrasts are evaluated at once as C β / diag(C V Cᵀ) (see contrasts.py);
+    `contrasts` may be "pairwise" (default), "control", "trend" or custom weights
+    over condition_levels, and p_adjust may be "fdr_bh", "bonferroni" or "holm".
     """
-    beta = res.params
-    V    = res.cov_params()
-
-    # Build fixed-effect contrast vectors for mean(Gaze_c)=0
-    # Param names like: 'Intercept', 'Gaze_c', 'C(Condition)[T.L2]', 'Gaze_c:C(Condition)[T.L2]', ...
-    names = list(beta.index)
-    def cvec_for_level(level):
-        c = np.zeros(len(names))
-        # mean at level L:
-        # mu(L) = Intercept + [C(Condition)[T.L]]  (since Gaze_c=0 -> interaction drops)
-        c[names.index("Intercept")] = 1.0
-        pname = f"{design_prefix}[T.{level}]"
-        if pname in names:
-            c[names.index(pname)] = 1.0
-        return c
-
-    results = []
-    for i in range(len(condition_levels)):
-        for j in range(i+1, len(condition_levels)):
-            g1, g2 = condition_levels[i], condition_levels[j]
-            c = cvec_for_level(g2) - cvec_for_level(g1)
-            est = float(c @ beta.values)
-            se  = float(np.sqrt(c @ V.values @ c))
-            z   = est / se if se > 0 else np.nan
-            p   = 2.0 * (1.0 - norm.cdf(abs(z))) if np.isfinite(z) else np.nan
-            ci_low = est - 1.96 * se if np.isfinite(se) else np.nan
-            ci_high = est + 1.96 * se if np.isfinite(se) else np.nan
-            results.append((g1, g2, est, se, z, p, ci_low, ci_high))
-    out = pd.DataFrame(
-        results,
-        columns=["Group1", "Group2", "Estimate", "SE", "z", "p", "CI95_low", "CI95_high"]
-    )
-    # Benjamini–Hochberg FDR
-    if len(out) > 0:
-        _, p_adj, _, _ = multipletests(out["p"].values, method="fdr_bh")
-        out["p_adj"] = p_adj
-    else:
-        out["p_adj"] = out["p"]
-    return out
+    out = level_contrasts(res, condition_levels, design_prefix, contrasts=contrasts,
+                          control=control, p_adjust_method=p_adjust)
+    return out.rename(columns={
+        "group1": "Group1", "group2": "Group2", "estimate": "Estimate", "se": "SE",
+        "ci_low": "CI95_low", "ci_high": "CI95_high",
+    })[["Group1", "Group2", "Estimate", "SE", "z", "p", "CI95_low", "CI95_high", "p_adj"]]
 
-def mixedlm_fixed_effects_to_df(res, task=None, variable=None, model_label=None):
+@instrumented
+def extract_fixed_effects(res, scale_re=True, ci_fallback=False):
     """
     Extract fixed-effect summaries from a statsmodels result (MixedLM or OLS)
-    into a tidy DataFrame: term, beta, SE, z/t, p, CI.
-    Optionally annotate with Task / Variable / ModelLabel columns.
+    into a DataFrame: Term, beta, SE, stat (z/t), p, CI_low, CI_high.
+
+    SE falls back from bse to bse_fe; stat and p are computed from params/SE
+    (two-sided normal) when the result does not provide them. If conf_int() fails,
+    the CI is NaN, or params ± 1.96·SE with ci_fallback=True; df.attrs["ci"] records
+    which ("conf_int", "normal" or None). With scale_re=True, random-effect
+    variance/covariance rows are converted back to the DV scale (see below).
     """
-    params = res.params
+    params = getattr(res, "params", None)
+    if params is None:
+        raise ValueError("Provided result has no .params; pass a fitted statsmodels result.")
+    if isinstance(params, (pd.Series, pd.DataFrame)):
+        params = params.squeeze()
+    params = pd.Series(params)
+
+    def aligned(obj):
+        return None if obj is None else pd.Series(obj, index=params.index, dtype=float)
 
-    # Standard errors: try bse, then bse_fe (MixedLM)
+    # Standard errors: try bse, then bse_fe (MixedLM) aligned to fixed-effect names
     se = getattr(res, "bse", None)
     if se is None and hasattr(res, "bse_fe"):
         se = res.bse_fe
-    if se is None:
-        # Fallback: no SE available
-        se = pd.Series(index=params.index, dtype=float)
+        try:
+            fe_names = getattr(res.model, "exog_names", None)
+            if isinstance(fe_names, list):
+                se = pd.Series(se, index=fe_names)
+        except Exception:
+            pass
+    se = aligned(se)
 
     # t/z statistics
-    stat = getattr(res, "tvalues", None)
-    if stat is None:
-        stat = getattr(res, "zvalues", None)
+    stat = aligned(getattr(res, "tvalues", None))
     if stat is None:
-        # compute from params / SE if possible
+        stat = aligned(getattr(res, "zvalues", None))
+    if stat is None and se is not None:
         stat = params / se
 
-    # p-values
-    pvals = getattr(res, "pvalues", None)
-    if pvals is None:
+    # p-values: two-sided normal approximation (matches statsmodels MixedLM)
+    pvals = aligned(getattr(res, "pvalues", None))
+    if pvals is None and stat is not None:
         from scipy.stats import norm
-        pvals = 2.0 * (1.0 - norm.cdf(np.abs(stat)))
+
+        pvals = pd.Series(2.0 * (1.0 - norm.cdf(np.abs(stat))), index=params.index)
+
+    nan = pd.Series(np.nan, index=params.index)
+    df = pd.DataFrame({
+        "Term": params.index,
+        "beta": params.values,
+        "SE": (se if se is not None else nan).values,
+        "stat": (stat if stat is not None else nan).values,
+        "p": (pvals if pvals is not None else nan).values,
+    })
 
     # confidence intervals
     try:
@@ -105,34 +438,39 @@ def mixedlm_fixed_effects_to_df(res, task=None, variable=None, model_label=None)
             ci.columns = ["ci_low", "ci_high"]
         else:
             ci = pd.DataFrame(ci, index=params.index, columns=["ci_low", "ci_high"])
-    except Exception:
-        ci = None
-
-    df = pd.DataFrame({
-        "Term": params.index,
-        "beta": params.values,
-        "SE":   se.reindex(params.index).values,
-        "stat": stat.reindex(params.index).values,
-        "p":    pvals.reindex(params.index).values
-    })
-
-    if ci is not None:
         ci = ci.reindex(params.index)
-        df["CI_low"]  = ci["ci_low"].values
+        df["CI_low"] = ci["ci_low"].values
         df["CI_high"] = ci["ci_high"].values
-    else:
-        df["CI_low"]  = np.nan
-        df["CI_high"] = np.nan
+        df.attrs["ci"] = "conf_int"
+    except Exception:
+        if ci_fallback and se is not None:
+            df["CI_low"] = (params - 1.96 * se).values
+            df["CI_high"] = (params + 1.96 * se).values
+            df.attrs["ci"] = "normal"
+        else:
+            df["CI_low"] = np.nan
+            df["CI_high"] = np.nan
+            df.attrs["ci"] = None
 
     # statsmodels MixedLM reports random-effect covariance parameters in a
     # scale-normalized parameterization (e.g., Group Var / scale). Convert
     # variance/covariance terms back to the DV scale for interpretable tables.
     scale = getattr(res, "scale", np.nan)
-    re_mask = df["Term"].astype(str).str.contains(r"(Var|Cov)$", regex=True)
-    if np.isfinite(scale) and np.any(re_mask):
+    re_mask = df["Term"].astype(str).str.contains(r"(?:Var|Cov)$", regex=True)
+    if scale_re and np.isfinite(scale) and np.any(re_mask):
         for col in ("beta", "SE", "CI_low", "CI_high"):
-            if col in df.columns:
-                df.loc[re_mask, col] = df.loc[re_mask, col] * float(scale)
+            df.loc[re_mask, col] = df.loc[re_mask, col] * float(scale)
+    return df
+
+
+@instrumented
+def mixedlm_fixed_effects_to_df(res, task=None, variable=None, model_label=None):
+    """
+    Extract fixed-effect summaries from a statsmodels result (MixedLM or OLS)
+    into a tidy DataFrame: term, beta, SE, z/t, p, CI (see extract_fixed_effects).
+    Optionally annotate with Task / Variable / ModelLabel columns.
+    """
+    df = extract_fixed_effects(res)
 
     # Optional annotations
     if task is not None:
@@ -161,4 +499,312 @@ def lr_effect_sizes(LR, df_diff, n_obs):
 
     R2_LR = 1.0 - np.exp(-LR / n_obs)
     f2_LR = R2_LR / (1.0 - R2_LR) if R2_LR < 1.0 else np.nan
-    return R2_LR, f2_LR
\ No newline at end of file
+    return R2_LR, f2_LR
+
+def _run_parallel(func, jobs, n_jobs=None):
+    """Map func over jobs, in order; serially when n_jobs == 1 or there is one job."""
+    jobs = list(jobs)
+    if n_jobs is None:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = max(1, min(int(n_jobs), len(jobs)))
+    if n_jobs == 1:
+        return [func(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=n_jobs) as ex:
+        return worker_map(ex, func, jobs)
+
+
+def _fit_many_worker(job):
+    t0 = time.perf_counter()
+    summary = None
+    try:
+        res = fit_mixedlm(job["formula"], job["data"], job["group"], **job["fit_kwargs"])
+        df = mixedlm_fixed_effects_to_df(res)
+        converged, error, n_obs = bool(getattr(res, "converged", True)), None, float(res.nobs)
+        optimizer = getattr(res, "fit_optimizer", job["fit_kwargs"]["method"])
+        if job["summary"]:
+            summary = summarize(res)
+    except Exception as exc:  # one bad model must not take the batch down
+        df = pd.DataFrame({"Term": [np.nan]})
+        converged, error, optimizer, n_obs = False, f"{type(exc).__name__}: {exc}", None, np.nan
+    df.insert(0, "Task", job["task"])
+    df.insert(1, "DV", job["dv"])
+    df.insert(2, "ModelLabel", job["model_label"])
+    df["n_obs"] = n_obs                 # rows used by the fit (after dropping missing values)
+    df["fit_seconds"] = time.perf_counter() - t0
+    df["converged"] = converged
+    df["optimizer"] = optimizer
+    df["error"] = error
+    return (df, summary) if job["summary"] else df
+
+
+@instrumented
+def fit_many(specs, data, n_jobs=None, reml=False, method="lbfgs", maxiter=500, fallback=None,
+             timeout=None, summaries=False):
+    """
+    Fit many `fit_mixedlm` models on a process pool and return one tidy table.
+
+    specs : DataFrame or list of dicts, one row per model, with keys
+        formula     : patsy formula (required)
+        group       : grouping column for the random intercept (required)
+        subset      : optional DataFrame.query string selecting the rows to use
+        data        : optional key into `data` when `data` is a dict of DataFrames
+        task, dv, model_label : optional annotations (dv defaults to the formula LHS)
+    data : DataFrame, or dict of DataFrames referenced by the `data` key of each spec
+    n_jobs : worker processes (default: all cores; 1 fits serially)
+    fallback, timeout : optimizer chain and per-fit time budget (see fit_mixedlm_robust),
+        so that a pathological model cannot stall the batch
+
+    Each worker receives only the rows and columns its formula needs (the complete
+    cases of those columns). The result stacks `mixedlm_fixed_effects_to_df` for every
+    fit with Task/DV/ModelLabel filled in, plus n_obs (rows used by the fit),
+    fit_seconds, converged, optimizer and error (failed fits give one row with the
+    error message instead of raising).
+
+    summaries : also return the fits, as (table, [FitSummary or None per spec]);
+        workers send back only the compact summaries (see fit_summary.py), not the
+        full results with their data
+    """
+    if isinstance(specs, pd.DataFrame):
+        specs = specs.to_dict("records")
+    fit_kwargs = {"reml": reml, "method": method, "maxiter": maxiter, "fallback": fallback,
+                  "timeout": timeout}
+
+    def _get(spec, key):
+        val = spec.get(key)
+        return None if val is None or (isinstance(val, float) and np.isnan(val)) else val
+
+    jobs = []
+    for spec in specs:
+        formula, group = spec["formula"], spec["group"]
+        src = data[spec["data"]] if isinstance(data, dict) else data
+        cols = formula_columns(formula, src.columns)
+        if group not in cols:
+            cols.append(group)
+        subset = _get(spec, "subset")
+        sub = src.query(subset) if subset else src
+        dv = _get(spec, "dv")
+        jobs.append({
+            "formula": formula,
+            "group": group,
+            "data": sub[cols].dropna(),     # the rows patsy would keep
+            "fit_kwargs": fit_kwargs,
+            "task": _get(spec, "task"),
+            "dv": dv if dv is not None else formula.split("~")[0].strip(),
+            "model_label": _get(spec, "model_label"),
+            "summary": summaries,
+        })
+
+    if not jobs:
+        return (pd.DataFrame(), []) if summaries else pd.DataFrame()
+    out = _run_parallel(_fit_many_worker, jobs, n_jobs)
+    if summaries:
+        return pd.concat([df for df, _ in out], ignore_index=True), [s for _, s in out]
+    return pd.concat(out, ignore_index=True)
+
+
+def _multi_worker(job):
+    t0 = time.perf_counter()
+    summary = None
+    try:
+        if job["stats"] is not None:
+            res = fit_random_intercept(job["stats"], reml=job["reml"], formula=job["formula"])
+            optimizer = "bounded-brent"
+        else:
+            res = mixedlm_from_matrices(job["formula"], *job["matrices"]).fit(
+                reml=job["reml"], method=job["method"], maxiter=job["maxiter"], disp=False)
+            optimizer = job["method"]
+        df = mixedlm_fixed_effects_to_df(res)
+        converged, error, n_obs = bool(getattr(res, "converged", True)), None, float(res.nobs)
+        if job["summary"]:
+            summary = summarize(res)
+    except Exception as exc:  # one bad DV must not take the batch down
+        df = pd.DataFrame({"Term": [np.nan]})
+        converged, error, optimizer, n_obs = False, f"{type(exc).__name__}: {exc}", None, np.nan
+    df.insert(0, "Task", job["task"])
+    df.insert(1, "DV", job["dv"])
+    df.insert(2, "ModelLabel", job["model_label"])
+    df["n_obs"] = n_obs
+    df["fit_seconds"] = time.perf_counter() - t0
+    df["converged"] = converged
+    df["optimizer"] = optimizer
+    df["error"] = error
+    return df, summary
+
+
+@instrumented
+def fit_mixedlm_multi(dvs, rhs, data, group, solver="fast", reml=False, method="lbfgs", maxiter=500,
+                      n_jobs=1, task=None, model_label=None, summaries=False, design=None):
+    """
+    Fit the same right-hand side and (1|group) to many dependent variables.
+
+    dvs : response columns (e.g. frequency bands, channels, gaze metrics)
+    rhs : right-hand side of the formula, e.g. "Gaze_c * C(Condition)"
+    solver : "fast" (default) or "statsmodels", as in fit_mixedlm
+    n_jobs : worker processes for the per-DV fits (default 1; the fast per-DV step
+        is a 1-D optimization, so processes pay off mainly for solver="statsmodels")
+    summaries : also return [FitSummary per DV] (None for failed fits)
+    design : DesignCache (or True) to share the predictor design with other calls
+
+    The work that does not depend on the response is done once: the design matrix
+    (see design_cache.py) and, for the fast solver, the group indexing, group sums
+    of X and X'X (lmm_solver.multi_response_stats); per DV only the group sums of y,
+    X'y and y'y are formed before its optimization. Rows with a missing value in a
+    DV are dropped for that DV only. Every DV gives the same fit as a separate
+    fit_mixedlm(f"{dv} ~ {rhs}", data, group, solver=...) call (for the fast solver up
+    to the optimizer tolerance: the sums are formed in a different order).
+
+    Returns one stacked table like fit_many: `mixedlm_fixed_effects_to_df` per DV
+    with Task/DV/ModelLabel, n_obs, fit_seconds, converged, optimizer and error.
+    """
+    from design_cache import DesignCache
+
+    if solver not in ("fast", "statsmodels"):
+        raise ValueError(f"Unknown solver: {solver}")
+    dvs = list(dvs)
+    design = resolve_design_cache(design) or DesignCache()
+    d = design.design(rhs, data, group)
+    formulas = [f"{dv} ~ {rhs}" for dv in dvs]
+    base = {"reml": reml, "method": method, "maxiter": maxiter, "task": task,
+            "model_label": model_label, "summary": summaries}
+
+    if solver == "fast":
+        Y = data[dvs].to_numpy(dtype=float)[d.rows]
+        stats = multi_response_stats(Y, d.X.to_numpy(), d.groups, list(d.X.columns), dvs)
+        for st in stats:
+            st.levels = dict(d.levels)
+        jobs = [{**base, "dv": dv, "formula": f, "stats": st} for dv, f, st in zip(dvs, formulas, stats)]
+    else:
+        jobs = [{**base, "dv": dv, "formula": f, "stats": None,
+                 "matrices": design.model_matrices(f, data, group)[:3]}
+                for dv, f in zip(dvs, formulas)]
+
+    if not jobs:
+        return (pd.DataFrame(), []) if summaries else pd.DataFrame()
+    out = _run_parallel(_multi_worker, jobs, n_jobs)
+    table = pd.concat([df for df, _ in out], ignore_index=True)
+    return (table, [s for _, s in out]) if summaries else table
+
+
+def _term_code(term):
+    return ":".join(f.code for f in term.factors)
+
+
+def droppable_terms(formula):
+    """
+    RHS terms of a formula that may be dropped under the marginality principle:
+    the intercept is never dropped, and a term is only dropped when no higher-order
+    term in the model contains it (as R's drop1 does).
+    """
+    from patsy import ModelDesc
+
+    terms = [t for t in ModelDesc.from_formula(formula).rhs_termlist if t.factors]
+    out = []
+    for t in terms:
+        fs = set(t.factors)
+        if not any(fs < set(u.factors) for u in terms):
+            out.append(_term_code(t))
+    return out
+
+
+def reduced_formula(formula, term):
+    """Formula with one RHS term removed, e.g. ('y ~ a * b', 'a:b') -> 'y ~ a + b'."""
+    from patsy import ModelDesc
+
+    desc = ModelDesc.from_formula(formula)
+    lhs = " + ".join(_term_code(t) for t in desc.lhs_termlist)
+    has_intercept = any(not t.factors for t in desc.rhs_termlist)
+    keep = [_term_code(t) for t in desc.rhs_termlist if t.factors and _term_code(t) != term]
+    if len(keep) == len([t for t in desc.rhs_termlist if t.factors]):
+        raise ValueError(f"Term '{term}' not found in formula: {formula}")
+    rhs = " + ".join(keep)
+    if not has_intercept:
+        rhs = f"0 + {rhs}" if rhs else "0"
+    return f"{lhs} ~ {rhs if rhs else '1'}"
+
+
+@instrumented(name="mixedlm_helpers.drop1_all.fit")
+def _drop1_worker(job):
+    t0 = time.perf_counter()
+    model = mixedlm_from_matrices(job["formula"], *job["matrices"])
+    res = model.fit(start_params=job["start_params"], disp=False, full_output=enabled(),
+                    **job["fit_kwargs"])
+    if enabled():
+        annotate(solver="statsmodels", optimizer=job["fit_kwargs"]["method"], **fit_diagnostics(res))
+    return {"llf": float(res.llf), "df_modelwc": int(res.df_modelwc), "nobs": float(res.nobs),
+            "converged": bool(getattr(res, "converged", True)), "fit_seconds": time.perf_counter() - t0}
+
+
+def _packed_re_start(res):
+    """
+    Covariance parameters of a fit in the packed form statsmodels takes as
+    start_params (Cholesky factor of cov_re / scale); also works for fast-solver
+    results and FitSummary objects. None (no warm start) if not positive definite.
+    """
+    po = getattr(res, "params_object", None)
+    if po is not None:
+        return po.get_packed(use_sqrt=res.model.use_sqrt, has_fe=False)
+    try:
+        L = np.linalg.cholesky(np.atleast_2d(np.asarray(res.cov_re_unscaled, dtype=float)))
+    except np.linalg.LinAlgError:
+        return None
+    return L[np.tril_indices(L.shape[0])]
+
+
+@instrumented
+def drop1_all(formula, data, group, n_jobs=None, method="lbfgs", maxiter=500, full_res=None):
+    """
+    Likelihood-ratio tests for every droppable term of a MixedLM (drop1 style).
+
+    All models are fitted on the complete cases of the full model's columns, as in
+    R's drop1. Fits the full model once (ML; or reuses `full_res`, which may also be
+    a FitSummary and must be an ML fit on those rows), builds each reduced model by
+    removing one term that is not contained in a higher-order interaction, and fits
+    the reduced models in parallel,
+    warm-started from the full model's covariance parameters. The full design matrix
+    is built once; the reduced designs are column subsets of it (see design_cache.py).
+    Returns one row per term with the `drop1_lrt` statistics plus the
+    `lr_effect_sizes` columns R2_LR and f2_LR.
+    """
+    from design_cache import DesignCache
+
+    fit_kwargs = {"reml": False, "method": method, "maxiter": maxiter}
+    cols = formula_columns(formula, data.columns)
+    if group not in cols:
+        cols.append(group)
+    # complete cases over every column of the full model, so that reduced models
+    # without a predictor do not pick up the rows it is missing on
+    sub = data[cols].dropna()
+
+    design = DesignCache()
+    if full_res is None:
+        full_res = fit_mixedlm(formula, sub, group, design=design, **fit_kwargs)
+    else:
+        if getattr(full_res, "method", None) == "REML" or getattr(full_res, "reml", None):
+            raise ValueError("full_res must be fitted by ML (reml=False) for likelihood-ratio tests")
+        if float(full_res.nobs) != len(sub):
+            raise ValueError(f"full_res was fitted on {full_res.nobs:g} rows, but the complete cases of "
+                             f"the model columns are {len(sub)} rows")
+        design.design(formula.split("~", 1)[1], sub, group)
+    start = _packed_re_start(full_res)
+    n_obs = float(full_res.nobs)
+
+    terms = droppable_terms(formula)
+    jobs = []
+    for t in terms:
+        f = reduced_formula(formula, t)
+        jobs.append({"formula": f, "matrices": design.model_matrices(f, sub, group)[:3],
+                     "start_params": start, "fit_kwargs": fit_kwargs})
+    fits = _run_parallel(_drop1_worker, jobs, n_jobs)
+    for job, fit in zip(jobs, fits):
+        if fit["nobs"] != n_obs:
+            raise ValueError(f"reduced model {job['formula']!r} was fitted on {fit['nobs']:g} rows, "
+                             f"the full model on {n_obs:g}")
+
+    rows = []
+    for term, job, fit in zip(terms, jobs, fits):
+        lrt = drop1_lrt(full_res, SimpleNamespace(**fit))
+        R2_LR, f2_LR = lr_effect_sizes(lrt["LR"], lrt["df_diff"], n_obs)
+        rows.append({"Term": term, "ReducedFormula": job["formula"], **lrt,
+                     "R2_LR": R2_LR, "f2_LR": f2_LR,
+                     "converged": fit["converged"], "fit_seconds": fit["fit_seconds"]})
+    return pd.DataFrame(rows)
@@ -1,19 +1,74 @@
+import numpy as np
+
+
 def _xpos_for_category_from_ticks(ax, category):
     """
     Infer the x position for a categorical label from current tick labels.
     This is a fallback when no explicit mapping is provided.
     """
+    lab2x = _tick_xmap(ax)
+    key = category if category in lab2x else str(category)
+    if key not in lab2x:
+        raise KeyError(f"Category '{category}' not found in axis tick labels: {list(lab2x)}")
+    return lab2x[key]
+
+
+def _tick_xmap(ax):
+    """{tick label: x position} for the current x ticks."""
     ticks = ax.get_xticks()
     labels = [t.get_text() for t in ax.get_xticklabels()]
-    lab2x = {lab: x for lab, x in zip(labels, ticks)}
-    if category not in lab2x:
-        raise KeyError(f"Category '{category}' not found in axis tick labels: {labels}")
-    return lab2x[category]
+    return {lab: x for lab, x in zip(labels, ticks)}
+
 
+def _comparisons_from_frame(df, labels, p_col, hide_ns):
+    """(comparisons, labels) from a contrasts table (mixedlm_pairwise_contrasts etc.)."""
+    from stats_helpers import p_to_signif
 
-def add_stat_brackets(ax, xcats, comparisons, y_positions, labels,
+    g1 = "group1" if "group1" in df.columns else "Group1"
+    g2 = "group2" if "group2" in df.columns else "Group2"
+    if p_col is None:
+        p_col = "p_adj" if "p_adj" in df.columns else "p"
+    comparisons = list(zip(df[g1], df[g2]))
+    if labels is None:
+        labels = [p_to_signif(p) for p in df[p_col]]
+    if hide_ns:
+        keep = [lab != "n.s." for lab in labels]
+        comparisons = [c for c, k in zip(comparisons, keep) if k]
+        labels = [lab for lab, k in zip(labels, keep) if k]
+    return comparisons, list(labels)
+
+
+def bracket_tiers(x1, x2):
+    """
+    Stack intervals [x1, x2] into tiers so that brackets never overlap.
+
+    Intervals are placed shortest first; each goes one tier above the highest
+    interval already placed that it overlaps. Intervals that only share an end point
+    (adjacent pairs) may share a tier. A wide comparison therefore always sits above
+    the narrower ones it spans. Returns the tier (0, 1, ...) of every interval.
+    """
+    x1 = np.asarray(x1, dtype=float)
+    x2 = np.asarray(x2, dtype=float)
+    lo, hi = np.minimum(x1, x2), np.maximum(x1, x2)
+    # skyline over the distinct end points and the gaps between them: end point k is
+    # cell 2k, so an interval occupies cells 2a+1 .. 2b-1 (its interior)
+    xs, inv = np.unique(np.concatenate([lo, hi]), return_inverse=True)
+    a, b = 2 * inv[: len(lo)] + 1, 2 * inv[len(lo):] - 1
+    height = np.zeros(2 * len(xs), dtype=int)
+    tiers = np.zeros(len(lo), dtype=int)
+    for i in np.lexsort((lo, hi - lo)):
+        if b[i] < a[i]:
+            continue            # zero-width comparison
+        t = height[a[i]: b[i] + 1].max()
+        tiers[i] = t
+        height[a[i]: b[i] + 1] = t + 1
+    return tiers
+
+
+def add_stat_brackets(ax, xcats, comparisons, y_positions=None, labels=None,
                       bracket_height=0.02, lw=1.5, text_offset=0.01, fontsize=12,
-                      xmap=None):
+                      xmap=None, batched=False, y_start=None, tier_step=0.07,
+                      p_col=None, hide_ns=False):
     """
     Draw significance brackets between category pairs on a categorical x-axis.
 
@@ -21,9 +76,14 @@ def add_stat_brackets(ax, xcats, comparisons, y_positions, labels,
     ----------
     ax : matplotlib Axes
     xcats : sequence of category labels (for reference/order; not strictly required)
-    comparisons : list of (cat1, cat2) tuples
-    y_positions : list of float (data coords) for each comparison’s bracket baseline
-    labels : list of strings (e.g., '*', 'n.s.')
+    comparisons : list of (cat1, cat2) tuples, or a contrasts DataFrame with
+        group1/group2 (or Group1/Group2) columns, e.g. the output of
+        mixedlm_pairwise_contrasts or pairwise_condition_contrasts_at_mean_gaze
+    y_positions : list of float (data coords) for each comparison’s bracket baseline.
+        If None, brackets are stacked automatically (see bracket_tiers) from y_start
+        upwards.
+    labels : list of strings (e.g., '*', 'n.s.'); for a DataFrame defaults to
+        p_to_signif of column `p_col` (default p_adj, else p)
     bracket_height : fraction of y-range used as bracket height
     lw : line width
     text_offset : fraction of y-range above bracket for the label
@@ -31,28 +91,83 @@ def add_stat_brackets(ax, xcats, comparisons, y_positions, labels,
     xmap : dict or None
         Optional explicit mapping {category_label: x_position}. If None, the function
         infers x from current xticks/xticklabels on the axes.
+    batched : draw all brackets as a single LineCollection instead of one line per
+        comparison (much faster for many comparisons or panels); the labels are
+        still one ax.text each
+    y_start : baseline of the lowest tier for automatic stacking (default: top of
+        the current y-limits); the y-limits are extended to fit the stacked brackets,
+        and bracket ends are inset slightly so that adjacent brackets on one tier
+        do not share a leg
+    tier_step : vertical distance between tiers as a fraction of the final
+        (extended) y-range, i.e. of the axes height
+    hide_ns : skip comparisons labelled 'n.s.'
+
+    Returns the LineCollection when batched, else None.
     """
+    if hasattr(comparisons, "columns"):
+        comparisons, labels = _comparisons_from_frame(comparisons, labels, p_col, hide_ns)
+    else:
+        comparisons = list(comparisons)
+    if labels is None:
+        raise ValueError("labels are required unless comparisons is a contrasts DataFrame")
+
     y0, y1 = ax.get_ylim()
     yr = (y1 - y0)
     h_px = bracket_height * yr
     tofs = text_offset * yr
 
-    def _xpos_for_category(cat):
-        if xmap is not None:
-            if cat not in xmap:
-                raise KeyError(f"Category '{cat}' not found in xmap keys: {list(xmap.keys())}")
-            return xmap[cat]
-        return _xpos_for_category_from_ticks(ax, cat)
-
-    for (g1, g2), y, lab in zip(comparisons, y_positions, labels):
-        x1 = _xpos_for_category(g1)
-        x2 = _xpos_for_category(g2)
-        if x1 > x2:
-            x1, x2 = x2, x1
-
-        ax.plot([x1, x1, x2, x2],
-                [y,  y + h_px, y + h_px, y],
-                linewidth=lw, color="black", clip_on=False)
-
-        ax.text((x1 + x2) / 2.0, y + h_px + tofs, lab,
-                ha="center", va="bottom", fontsize=fontsize)
\ No newline at end of file
+    # resolve every category once
+    lab2x = xmap if xmap is not None else _tick_xmap(ax)
+    source = "xmap keys" if xmap is not None else "axis tick labels"
+    xs = np.empty((len(comparisons), 2))
+    for i, pair in enumerate(comparisons):
+        for j, cat in enumerate(pair):
+            # tick labels are strings; condition levels from a contrasts table may not be
+            key = cat if cat in lab2x else str(cat)
+            if key not in lab2x:
+                raise KeyError(f"Category '{cat}' not found in {source}: {list(lab2x.keys())}")
+            xs[i, j] = lab2x[key]
+    xs.sort(axis=1)
+
+    auto = y_positions is None
+    if auto:
+        base = y1 if y_start is None else y_start
+        tiers = bracket_tiers(xs[:, 0], xs[:, 1])
+        # step s such that s = tier_step * final range, with the final top at
+        # base + n_tiers * s + bracket + label offset
+        n_tiers = tiers.max() + 1 if len(tiers) else 0
+        span = max(base, y1) - y0 + h_px + tofs
+        step = tier_step * span / max(1.0 - n_tiers * tier_step, 0.1)
+        y = base + tiers * step
+        gaps = np.diff(np.unique(xs))
+        if gaps.size:
+            inset = 0.03 * gaps.min()
+            xs = xs + np.array([inset, -inset])
+    else:
+        y = np.asarray(y_positions, dtype=float)
+        n = min(len(xs), len(y), len(labels))
+        xs, y = xs[:n], y[:n]
+
+    if batched:
+        from matplotlib.collections import LineCollection
+
+        segs = np.empty((len(xs), 4, 2))
+        segs[:, :, 0] = xs[:, [0, 0, 1, 1]]
+        segs[:, :, 1] = y[:, None] + np.array([0.0, h_px, h_px, 0.0])
+        lines = LineCollection(segs, linewidths=lw, colors="black", clip_on=False)
+        ax.add_collection(lines, autolim=False)
+    else:
+        lines = None
+        for (x1, x2), yb in zip(xs, y):
+            ax.plot([x1, x1, x2, x2],
+                    [yb,  yb + h_px, yb + h_px, yb],
+                    linewidth=lw, color="black", clip_on=False)
+
+    for (x1, x2), yb, lab in zip(xs, y, labels):
+        ax.text((x1 + x2) / 2.0, yb + h_px + tofs, lab,
+                ha="center", va="bottom", fontsize=fontsize)
+
+    if auto and len(y):
+        # room for the top tier and its label
+        ax.set_ylim(y0, max(y1, y.max() + h_px + tofs + step))
+    return lines
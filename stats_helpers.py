@@ -1,8 +1,11 @@
 import numpy as np
 import pandas as pd
-import statsmodels.formula.api as smf
-from scipy.stats import norm
-from statsmodels.stats.multitest import multipletests
+
+from contrasts import level_contrasts
+from fit_cache import resolve_cache
+from instrumentation import annotate, enabled, fit_diagnostics, instrumented
+from lmm_solver import fit_random_intercept, one_factor_stats, update_random_intercept
+from mixedlm_helpers import DEFAULT_FALLBACK, fit_mixedlm_robust, mixedlm_from_matrices
 
 def p_to_signif(p):
     if p < 0.001:
@@ -33,101 +36,164 @@ def _mask_series(s: pd.Series) -> pd.Series:
     keep = s.isna() | ((s >= lower) & (s <= upper))
     return s.where(keep)
 
-def iqr_outlier_filter(df: pd.DataFrame, variables, by):
+def _iqr_bounds(x: pd.DataFrame, codes: np.ndarray):
     """
-    Set outliers to NaN per group for each variable via 1.5×IQR.
-    Uses SeriesGroupBy.apply with group_keys=False to keep the original row index.
+    Per-group 1.5×IQR bounds for every column of ``x`` in one grouped-quantile pass.
+    Returns (lower, upper) arrays of shape (n_groups, n_columns); groups that
+    `_mask_series` would leave alone (fewer than 3 values or a zero/non-finite IQR)
+    get infinite bounds so that broadcasting keeps every value.
     """
-    out = df.copy()
-    if isinstance(by, str):
-        by = [by]
+    g = x.groupby(codes, sort=True)
+    n = g.count().to_numpy()
+    q = g.quantile([0.25, 0.75])                          # index: (code, q)
+    q1 = q.xs(0.25, level=-1).to_numpy(dtype=float)
+    q3 = q.xs(0.75, level=-1).to_numpy(dtype=float)
+    iqr = q3 - q1
 
-    g = out.groupby(by, observed=True, sort=False, dropna=False, group_keys=False)
+    with np.errstate(invalid="ignore"):
+        active = (n >= 3) & np.isfinite(iqr) & (iqr != 0)
+        lower = np.where(active, q1 - 1.5 * iqr, -np.inf)
+        upper = np.where(active, q3 + 1.5 * iqr, np.inf)
+    return lower, upper
 
-    for v in variables:
-        masked = g[v].apply(_mask_series)                 # no FutureWarning
-        out[v] = masked.reindex(out.index)                # align defensively
+@instrumented
+def iqr_outlier_filter(df: pd.DataFrame, variables, by, engine="vectorized", inplace=False):
+    """
+    Set outliers to NaN per group for each variable via 1.5×IQR.
 
+    engine="vectorized" computes the quartiles of all groups for all variables in a
+    single grouped-quantile pass and applies the bounds by broadcasting; only columns
+    that actually lose values are copied (or none, with inplace=True), the rest of the
+    returned frame shares memory with ``df``.
+    engine="apply" is the original SeriesGroupBy.apply(_mask_series) implementation
+    (group_keys=False keeps the original row index). Both give identical results.
+    """
+    if isinstance(by, str):
+        by = [by]
+    variables = list(variables)
+    annotate(engine=engine, rows=len(df))
+
+    if engine == "apply":
+        out = df if inplace else df.copy()
+        g = out.groupby(by, observed=True, sort=False, dropna=False, group_keys=False)
+        for v in variables:
+            masked = g[v].apply(_mask_series)             # no FutureWarning
+            out[v] = masked.reindex(out.index)            # align defensively
+        return out
+    if engine != "vectorized":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    out = df if inplace else df.copy(deep=False)
+    if len(df) == 0 or not variables:
+        return out
+
+    codes = df.groupby(by, observed=True, sort=False, dropna=False).ngroup().to_numpy()
+    x = df[variables].astype(float)
+    lower, upper = _iqr_bounds(x, codes)
+
+    # ngroup() numbers groups 0..G-1, so the sorted quantile rows line up with codes
+    vals = x.to_numpy()
+    with np.errstate(invalid="ignore"):
+        drop = (vals < lower[codes]) | (vals > upper[codes])
+
+    for j, v in enumerate(variables):
+        if drop[:, j].any():
+            out[v] = df[v].mask(drop[:, j])
     return out
 
-def _mixedlm_fit(df, value_col, group_col, id_col):
+def _one_factor_design(df, value_col, group_col, id_col):
+    """
+    (endog, exog, groups) of value ~ C(group) straight from the category codes, with
+    the column names patsy would give (treatment coding, first category as baseline);
+    rows with a missing value, group or ID are dropped.
+    """
+    cat = df[group_col].cat
+    y = df[value_col].to_numpy(dtype=float)
+    codes = cat.codes.to_numpy()
+    ok = ~np.isnan(y) & (codes >= 0) & df[id_col].notna().to_numpy()
+    codes = codes[ok]
+    X = np.zeros((len(codes), len(cat.categories)))
+    X[:, 0] = 1.0
+    dummy = codes > 0
+    X[np.flatnonzero(dummy), codes[dummy]] = 1.0
+    names = ["Intercept"] + [f"C({group_col})[T.{c}]" for c in cat.categories[1:]]
+    index = df.index[ok]
+    return (pd.Series(y[ok], index=index, name=value_col), pd.DataFrame(X, index=index, columns=names),
+            df[id_col].to_numpy()[ok])
+
+@instrumented
+def _mixedlm_fit(df, value_col, group_col, id_col, cache=None, solver="statsmodels", previous=None,
+                 fallback=None, timeout=None):
     # Treatment coding with first category as baseline (like R’s default)
-    df = df.copy()
-    df[group_col] = pd.Categorical(df[group_col], ordered=True)
+    # solver="fast" uses the profiled random-intercept solver (lmm_solver.py)
+    # only the model columns are copied; an ordered categorical (e.g. from
+    # aoc_feature_files.load_model_frame) is kept as is
+    # previous: fast-solver fit on earlier data; df then holds only the new rows,
+    #   coded with the previous condition levels and merged into its statistics
+    # fallback / timeout: optimizer chain and time budget (mixedlm_helpers.fit_mixedlm_robust)
+    df = df[list(dict.fromkeys([value_col, group_col, id_col]))].copy()
+    dtype = df[group_col].dtype
     formula = f"{value_col} ~ C({group_col})"
-    model = smf.mixedlm(formula, data=df, groups=df[id_col], re_formula="1")
-    res = model.fit(reml=False, method="lbfgs")
-    return res, df
-
-def _predicted_means_and_cov(res, df, group_col):
-    # With treatment coding and k levels (L1 baseline),
-    # mean(L1) = b0
-    # mean(Li) = b0 + b_C[Li] for i>=2
-    levels = list(df[group_col].cat.categories)
-    fe = res.params  # fixed effects
-    cov = res.cov_params()  # covariance of fixed effects
-    # map param names
-    # Expected names: Intercept, C(group)[T.level2], C(group)[T.level3], ...
-    means = {}
-    L = {}
-    for i, lev in enumerate(levels):
-        if i == 0:
-            # intercept
-            means[lev] = fe["Intercept"]
-            c = np.zeros(len(fe))
-            c[list(fe.index).index("Intercept")] = 1.0
-            L[lev] = c
-        else:
-            name = f"C({group_col})[T.{lev}]"
-            beta = fe.get(name, 0.0)
-            means[lev] = fe["Intercept"] + beta
-            c = np.zeros(len(fe))
-            c[list(fe.index).index("Intercept")] = 1.0
-            if name in fe.index:
-                c[list(fe.index).index(name)] = 1.0
-            L[lev] = c
-    return levels, means, L, cov
-
-def _contrast_test(c_vec, fe, cov):
-    # c_vec: contrast vector (1D array-like)
-    # fe:    fixed-effects coefficients (1D array-like)
-    # cov:   covariance matrix of fixed effects (2D array)
-    est = float(np.dot(c_vec, fe))
-    se = float(np.sqrt(np.dot(c_vec, np.dot(cov, c_vec))))
-    z = est / se if se > 0 else np.nan
-    p = 2 * (1 - norm.cdf(abs(z)))  # two-sided p-value from standard normal
-    return est, se, z, p
-
-def mixedlm_pairwise_contrasts(df, value_col="value", group_col="Condition", id_col="ID", p_adjust="fdr_bh"):
-    res, dfc = _mixedlm_fit(df, value_col, group_col, id_col)
-    levels, means, L, cov = _predicted_means_and_cov(res, dfc, group_col)
-    fe = res.params
-
-    # build pairwise list in canonical order
-    pairs = []
-    for i in range(len(levels)):
-        for j in range(i + 1, len(levels)):
-            g1, g2 = levels[i], levels[j]
-            # contrast mean(g2) - mean(g1) = (L[g2] - L[g1])' * beta
-            c_vec = L[g2] - L[g1]
-            est, se, z, p = _contrast_test(c_vec, fe, cov)
-            pairs.append((g1, g2, est, se, z, p))
-
-    out = pd.DataFrame(pairs, columns=["group1", "group2", "estimate", "se", "z", "p"])
-
-    if p_adjust is not None and len(out) > 0:
-        # map p_adjust to a statsmodels method string
-        pa = p_adjust.lower()
-        if pa in ("fdr", "fdr_bh", "bh"):
-            method = "fdr_bh"
-        elif pa in ("bonf", "bonferroni"):
-            method = "bonferroni"
-        else:
-            raise ValueError(f"Unknown p_adjust method: {p_adjust}")
-
-        padj = multipletests(out["p"].to_numpy(), method=method)[1]
-        out["p_adj"] = padj
+    if previous is not None:
+        if solver != "fast" or previous.formula != formula:
+            raise ValueError("Incremental updates need solver='fast' and a previous fit of the same model")
+        levels = previous.stats.levels
+        stats = one_factor_stats(df, value_col, group_col, id_col, levels=levels)
+        df[group_col] = pd.Categorical(df[group_col], categories=levels[group_col], ordered=True)
+        res = update_random_intercept(previous, stats)
+        if enabled():
+            annotate(solver=solver, optimizer="bounded-brent", incremental=True, **fit_diagnostics(res))
+        return res, df
+    if not (isinstance(dtype, pd.CategoricalDtype) and dtype.ordered):
+        df[group_col] = pd.Categorical(df[group_col], ordered=True)
+
+    def _fit():
+        if solver == "fast":
+            stats = one_factor_stats(df, value_col, group_col, id_col)
+            return fit_random_intercept(stats, reml=False, formula=formula)
+        if solver != "statsmodels":
+            raise ValueError(f"Unknown solver: {solver}")
+        if fallback is not None or timeout is not None:
+            chain = DEFAULT_FALLBACK if fallback is None or fallback is True else tuple(fallback)
+            return fit_mixedlm_robust(formula, df, id_col, fallback=chain, maxiter=500, timeout=timeout)
+        # the one-factor design needs no patsy pass over the data
+        model = mixedlm_from_matrices(formula, *_one_factor_design(df, value_col, group_col, id_col))
+        return model.fit(reml=False, method="lbfgs", maxiter=500, full_output=enabled())
+
+    cache = resolve_cache(cache)
+    if cache is None:
+        res = _fit()
     else:
-        out["p_adj"] = out["p"]
+        opts = {"reml": False, "method": "lbfgs", "maxiter": 500, "solver": solver,
+                "fallback": fallback, "timeout": timeout}
+        key = cache.key("_mixedlm_fit", formula, id_col, opts, df, [value_col, group_col, id_col])
+        hits = cache.hits
+        res = cache.get_or_fit(key, _fit)
+        annotate(cache_hit=cache.hits > hits)
+    if enabled():
+        optimizer = "bounded-brent" if solver == "fast" else getattr(res, "fit_optimizer", "lbfgs")
+        annotate(solver=solver, optimizer=optimizer, **fit_diagnostics(res))
+    return res, df
 
-    return out
+@instrumented
+def mixedlm_pairwise_contrasts(df, value_col="value", group_col="Condition", id_col="ID", p_adjust="fdr_bh",
+                               cache=None, contrasts="pairwise", control=None, solver="statsmodels",
+                               previous=None, return_fit=False, fallback=None, timeout=None):
+    """
+    Fit value ~ C(group) + (1|ID) and test contrasts between the condition means.
+    All contrasts come from one matrix evaluation (see contrasts.py); `contrasts`
+    may be "pairwise" (default), "control", "trend" or custom weights over the
+    levels, and p_adjust may be "fdr_bh", "bonferroni", "holm" or None.
+    previous: fit of an earlier call with solver="fast" (see return_fit); df then holds
+    only the newly added rows and the fit is updated incrementally.
+    return_fit: return (table, fit) instead of the table.
+    fallback / timeout: optimizer chain and time budget for the statsmodels fit
+    (see mixedlm_helpers.fit_mixedlm_robust).
+    """
+    res, dfc = _mixedlm_fit(df, value_col, group_col, id_col, cache=cache, solver=solver,
+                            previous=previous, fallback=fallback, timeout=timeout)
+    levels = list(dfc[group_col].cat.categories)
+    out = level_contrasts(res, levels, f"C({group_col})", contrasts=contrasts, control=control,
+                          p_adjust_method=p_adjust)
+    out = out[["group1", "group2", "estimate", "se", "z", "p", "p_adj"]]
+    return (out, res) if return_fit else out
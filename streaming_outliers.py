@@ -0,0 +1,244 @@
+"""
+Out-of-core 1.5×IQR outlier filtering for feature files that do not fit in memory.
+
+Two passes over a CSV or Parquet file:
+  1. read chunk by chunk and accumulate per-group quartile estimates for every
+     variable (exact while a group is small, a mergeable KLL quantile sketch once
+     it grows past `exact_max` values);
+  2. read again and write the masked output chunk by chunk.
+
+Peak memory scales with the number of groups (and `exact_max`), not the number of
+rows. Masking rules are those of `stats_helpers._mask_series`.
+"""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from aoc_feature_files import feature_file
+
+
+class QuantileSketch:
+    """
+    Mergeable KLL quantile sketch over float values.
+
+    Level h holds items of weight 2**h; a level that exceeds its capacity is
+    sorted and every other item (random offset) is promoted to the next level.
+    Normalized rank error is roughly 1.7/k (about 1% for the default k=200),
+    independent of the number of values seen.
+    """
+
+    def __init__(self, k=200, rng=None):
+        self.k = int(k)
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = rng if rng is not None else np.random.default_rng()
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return max(2, int(np.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if level.size > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                m = level.size - (level.size % 2)
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], level[offset:m:2]])
+                self.levels[h] = level[m:]
+            h += 1
+
+    def update(self, values):
+        x = np.asarray(values, dtype=float)
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return self
+        self.n += x.size
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """Approximate quantile(s) with numpy's default linear interpolation convention."""
+        if self.n == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(lv.size, 2.0 ** h) for h, lv in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, weights = items[order], weights[order]
+        # rank covered by each item, centred so that unit weights give ranks 0..n-1
+        centers = np.cumsum(weights) - (weights + 1.0) / 2.0
+        total = weights.sum()
+        return np.interp(np.asarray(q) * (total - 1.0), centers, items)
+
+
+class _GroupQuartiles:
+    """Exact value buffer that switches to a QuantileSketch once it exceeds exact_max."""
+
+    __slots__ = ("chunks", "n", "sketch")
+
+    def __init__(self):
+        self.chunks = []
+        self.n = 0
+        self.sketch = None
+
+    def update(self, x, exact_max, sketch_k, rng):
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return
+        self.n += x.size
+        if self.sketch is not None:
+            self.sketch.update(x)
+            return
+        self.chunks.append(x)
+        if self.n > exact_max:
+            self.sketch = QuantileSketch(k=sketch_k, rng=rng)
+            for c in self.chunks:
+                self.sketch.update(c)
+            self.chunks = []
+
+    def quartiles(self):
+        if self.n == 0:
+            return np.nan, np.nan
+        if self.sketch is not None:
+            q1, q3 = self.sketch.quantile([0.25, 0.75])
+        else:
+            q1, q3 = np.percentile(np.concatenate(self.chunks), [25, 75])
+        return float(q1), float(q3)
+
+
+def _read_chunks(path, chunksize, columns=None):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize, usecols=columns)
+
+
+def _group_ids(chunk, by, index):
+    """Map every row of a chunk to a stable group id shared across chunks."""
+    g = chunk.groupby(by, observed=True, sort=False, dropna=False)
+    gid = np.empty(len(chunk), dtype=np.int64)
+    for key, pos in g.indices.items():
+        key = key if isinstance(key, tuple) else (key,)
+        key = tuple(None if pd.isna(k) else k for k in key)
+        if key not in index:
+            index[key] = len(index)
+        gid[pos] = index[key]
+    return gid
+
+
+def iqr_outlier_filter_file(src, dst, variables, by, base_dir=None, chunksize=500_000,
+                            exact_max=10_000, sketch_k=200, seed=0):
+    """
+    Streaming version of `stats_helpers.iqr_outlier_filter` for CSV/Parquet files.
+
+    Parameters
+    ----------
+    src : input file; resolved with `aoc_feature_files.feature_file` when base_dir is given
+    dst : output file (.csv or .parquet); filtered variables are written as float
+    variables : columns to filter
+    by : grouping column(s)
+    chunksize : rows per chunk
+    exact_max : groups with at most this many non-NaN values use exact quartiles
+                (identical to the in-memory filter); larger groups use a KLL sketch
+    sketch_k : sketch size (rank error ≈ 1.7/k)
+    seed : seed for the sketch compaction, for reproducible output
+
+    Returns a dict with row/group counts and the number of values masked per variable.
+    """
+    if base_dir is not None:
+        src = feature_file(base_dir, src)
+    if isinstance(by, str):
+        by = [by]
+    variables = list(variables)
+    rng = np.random.default_rng(seed)
+
+    # ---------- pass 1: per-group quartile estimates ----------
+    index = {}
+    acc = []            # acc[gid][j] -> _GroupQuartiles
+    n_rows = 0
+    for chunk in _read_chunks(src, chunksize, columns=by + variables):
+        n_rows += len(chunk)
+        gid = _group_ids(chunk, by, index)
+        while len(acc) < len(index):
+            acc.append([_GroupQuartiles() for _ in variables])
+        order = np.argsort(gid, kind="stable")
+        bounds = np.flatnonzero(np.diff(gid[order])) + 1
+        vals = chunk[variables].to_numpy(dtype=float)[order]
+        for rows in np.split(np.arange(len(order)), bounds):
+            if rows.size == 0:
+                continue
+            g = gid[order[rows[0]]]
+            for j in range(len(variables)):
+                acc[g][j].update(vals[rows, j], exact_max, sketch_k, rng)
+
+    n_groups = len(index)
+    lower = np.full((n_groups, len(variables)), -np.inf)
+    upper = np.full((n_groups, len(variables)), np.inf)
+    n_sketched = 0
+    for g in range(n_groups):
+        for j in range(len(variables)):
+            st = acc[g][j]
+            n_sketched += st.sketch is not None
+            if st.n < 3:
+                continue
+            q1, q3 = st.quartiles()
+            iqr = q3 - q1
+            if np.isfinite(iqr) and iqr != 0:
+                lower[g, j] = q1 - 1.5 * iqr
+                upper[g, j] = q3 + 1.5 * iqr
+    del acc
+
+    # ---------- pass 2: write masked output ----------
+    masked = dict.fromkeys(variables, 0)
+    parquet_out = os.path.splitext(dst)[1].lower() in (".parquet", ".pq")
+    writer = None
+    first = True
+    try:
+        for chunk in _read_chunks(src, chunksize):
+            gid = _group_ids(chunk, by, index)
+            x = chunk[variables].to_numpy(dtype=float, copy=True)
+            with np.errstate(invalid="ignore"):
+                drop = (x < lower[gid]) | (x > upper[gid])
+            x[drop] = np.nan
+            for j, v in enumerate(variables):
+                chunk[v] = x[:, j]
+                masked[v] += int(drop[:, j].sum())
+
+            if parquet_out:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(dst, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(dst, mode="w" if first else "a", header=first, index=False)
+            first = False
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"rows": n_rows, "groups": n_groups, "sketched": n_sketched, "masked": masked}
@@ -0,0 +1,50 @@
+import json
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aoc_batch import load_spec, run
+
+
+@pytest.fixture
+def source(tmp_path):
+    rng = np.random.default_rng(1)
+    n_id, n_trials = 25, 40
+    df = pd.DataFrame({
+        "ID": np.repeat(np.arange(n_id), n_trials),
+        "Condition": np.tile([2, 4, 6, 8], n_id * n_trials // 4),
+        "z": rng.normal(size=n_id * n_trials),
+    })
+    u = rng.normal(size=n_id)[df["ID"]]
+    df["y"] = 0.1 * df["Condition"] + 0.3 * df["z"] + u + rng.normal(size=len(df))
+    df.loc[rng.choice(len(df), 200, replace=False), "z"] = np.nan
+    path = tmp_path / "features.csv"
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _run(tmp_path, source, fits):
+    spec_path = tmp_path / "spec.json"
+    spec_path.write_text(json.dumps({"data": {"source": source}, "fits": fits}))
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return run(load_spec(spec_path), out_dir=str(tmp_path), log=lambda msg: None)
+
+
+@pytest.mark.parametrize("solver", ["statsmodels", "fast"])
+def test_fit_results_do_not_depend_on_spec_order(tmp_path, source, solver):
+    full = {"formula": "y ~ z + C(Condition)", "group": "ID", "label": "full", "method": "bfgs",
+            "solver": solver}
+    red = {"formula": "y ~ C(Condition)", "group": "ID", "label": "red", "method": "bfgs",
+           "solver": solver}
+    together = _run(tmp_path, source, [full, red])
+    alone = _run(tmp_path, source, [red])
+    (_, res_together), (_, res_alone) = together["models"][1], alone["models"][0]
+    assert res_together.nobs == res_alone.nobs == 1000
+    pd.testing.assert_series_equal(res_together.params, res_alone.params, rtol=1e-6)
+    fe = together["fixed_effects"]
+    pd.testing.assert_frame_equal(
+        fe[fe["ModelLabel"] == "red"].reset_index(drop=True).drop(columns="fit_seconds", errors="ignore"),
+        alone["fixed_effects"].drop(columns="fit_seconds", errors="ignore"), rtol=1e-6)
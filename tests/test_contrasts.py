@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from statsmodels.stats.multitest import multipletests
+
+from contrasts import p_adjust
+
+P = np.array([0.01, 0.04, 0.03, 0.2, 0.001])
+
+
+@pytest.mark.parametrize("method", ["fdr_bh", "bonferroni", "holm"])
+def test_p_adjust_matches_multipletests(method):
+    np.testing.assert_allclose(p_adjust(P, method), multipletests(P, method=method)[1])
+
+
+@pytest.mark.parametrize("method", ["fdr_bh", "bonferroni", "holm"])
+def test_p_adjust_nan_is_not_a_test(method):
+    with_nan = np.insert(P, 2, np.nan)
+    out = p_adjust(with_nan, method)
+    assert np.isnan(out[2])
+    np.testing.assert_allclose(np.delete(out, 2), multipletests(P, method=method)[1])
+
+
+def test_p_adjust_aliases_and_errors():
+    np.testing.assert_allclose(p_adjust(P, "BH"), p_adjust(P, "fdr_bh"))
+    assert np.isnan(p_adjust([np.nan, np.nan])).all()
+    with pytest.raises(ValueError):
+        p_adjust(P, "sidak_typo")
@@ -0,0 +1,71 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from design_cache import DesignCache
+from mixedlm_helpers import drop1_all, drop1_lrt, fit_mixedlm
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(0)
+    n_id, n_trials = 20, 30
+    df = pd.DataFrame({
+        "ID": np.repeat([f"S{i:02d}" for i in range(n_id)], n_trials),
+        "Condition": np.tile(["L2", "L4", "L6"], n_id * n_trials // 3),
+        "X1": rng.normal(size=n_id * n_trials),
+        "X2": rng.normal(size=n_id * n_trials),
+    })
+    u = rng.normal(size=n_id)[np.repeat(np.arange(n_id), n_trials)]
+    df["y"] = 0.5 * df["X1"] + 0.2 * df["X2"] + u + rng.normal(size=len(df))
+    df.loc[rng.choice(len(df), 25, replace=False), "X2"] = np.nan     # only in the dropped term
+    return df
+
+
+def test_reduced_design_uses_its_own_complete_cases(data):
+    cache = DesignCache()
+    full = cache.design("X2 + X1 * C(Condition)", data, "ID")
+    assert len(full.rows) == len(data) - 25
+    for rhs in ("X1 + C(Condition)", "X1 + X1:C(Condition)"):
+        reduced = cache.design(rhs, data, "ID")
+        fresh = DesignCache().design(rhs, data, "ID")
+        np.testing.assert_array_equal(reduced.rows, np.arange(len(data)))
+        pd.testing.assert_frame_equal(reduced.X, fresh.X)
+    assert cache.derived == 0
+
+
+def test_reduced_design_is_cut_when_rows_coincide(data):
+    cache = DesignCache()
+    complete = data.dropna()
+    full = cache.design("X2 + X1 * C(Condition)", complete, "ID")
+    for rhs in ("X1 + C(Condition)", "X1 + X1:C(Condition)"):     # cut and re-evaluated
+        reduced = cache.design(rhs, complete, "ID")
+        np.testing.assert_array_equal(reduced.rows, full.rows)
+        pd.testing.assert_frame_equal(reduced.X, DesignCache().design(rhs, complete, "ID").X,
+                                      check_like=True)
+    assert cache.derived == 2
+
+
+@pytest.mark.parametrize("solver", ["statsmodels", "fast"])
+def test_fit_does_not_depend_on_cache_history(data, solver):
+    kw = {"method": "bfgs", "solver": solver}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        alone = fit_mixedlm("y ~ X1 + C(Condition)", data, "ID", design=DesignCache(), **kw)
+        warm = DesignCache()
+        fit_mixedlm("y ~ X2 + X1 + C(Condition)", data, "ID", design=warm, **kw)
+        after = fit_mixedlm("y ~ X1 + C(Condition)", data, "ID", design=warm, **kw)
+    assert after.nobs == alone.nobs == len(data)
+    pd.testing.assert_series_equal(after.params, alone.params, rtol=1e-6)
+
+
+def test_drop1_all_with_missing_values_in_dropped_term(data):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        table = drop1_all("y ~ X1 + X2", data, "ID", n_jobs=1, method="bfgs").set_index("Term")
+        sub = data.dropna()
+        full = fit_mixedlm("y ~ X1 + X2", sub, "ID", method="bfgs")
+        expected = drop1_lrt(full, fit_mixedlm("y ~ X1", sub, "ID", method="bfgs"))
+    assert table.loc["X2", "LR"] == pytest.approx(expected["LR"], rel=1e-4, abs=1e-6)
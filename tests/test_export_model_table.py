@@ -0,0 +1,34 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from export_model_table import export_model_table, export_model_tables
+from mixedlm_helpers import fit_mixedlm
+
+
+@pytest.fixture(scope="module")
+def res():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({"ID": np.repeat(np.arange(10), 20), "x": rng.normal(size=200)})
+    df["y"] = df["x"] + rng.normal(size=10)[df["ID"]] + rng.normal(size=200)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return fit_mixedlm("y ~ x", df, "ID", method="bfgs")
+
+
+def test_export_model_table_writes_docx_whatever_the_extension(res, tmp_path):
+    pytest.importorskip("docx")
+    path = tmp_path / "table.csv"
+    export_model_table(res, str(path))
+    assert path.read_bytes()[:2] == b"PK"            # a .docx is a zip archive
+
+
+def test_export_formats(res, tmp_path):
+    export_model_table(res, str(tmp_path / "a.txt"), format="md")
+    assert (tmp_path / "a.txt").read_text().startswith("**y ~ x**")
+    export_model_tables([res], str(tmp_path / "b.csv"))
+    assert pd.read_csv(tmp_path / "b.csv")["Variable"].iloc[0] == "Intercept"
+    with pytest.raises(ValueError):
+        export_model_tables([res], str(tmp_path / "c.csv"), format="xlsx")
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aoc_feature_files import FeatureStore, load_model_frame
+
+
+def _frame():
+    return pd.DataFrame({
+        "ID": np.repeat([2, 10, 101], 4),
+        "Condition": np.tile([2, 10], 6),
+        "y": np.arange(12, dtype=float),
+    })
+
+
+def test_categories_do_not_depend_on_file_format(tmp_path):
+    df = _frame()
+    df.to_csv(tmp_path / "f.csv", index=False)
+    df.to_parquet(tmp_path / "f.parquet", index=False)
+    csv = load_model_frame(str(tmp_path / "f.csv"), "y ~ C(Condition)", ["ID"])
+    pq = load_model_frame(str(tmp_path / "f.parquet"), "y ~ C(Condition)", ["ID"])
+    assert list(csv["ID"].cat.categories) == [2, 10, 101]
+    assert list(csv["Condition"].cat.categories) == [2, 10]
+    pd.testing.assert_frame_equal(csv, pq)
+
+
+@pytest.mark.parametrize("cache_format", ["parquet", "feather"])
+@pytest.mark.parametrize("kwargs", [{}, {"index_col": "ID"}, {"dtype": {"Condition": "category"}},
+                                    {"columns": ["y", "ID"]}])
+def test_feature_store_first_and_later_loads_are_identical(tmp_path, cache_format, kwargs):
+    pytest.importorskip("pyarrow")
+    features = tmp_path / "data" / "features"
+    features.mkdir(parents=True)
+    df = _frame()
+    df["label"] = ["a", None, "c"] * 4
+    df.to_csv(features / "AOC_f.csv", index=False)
+    store = FeatureStore(str(tmp_path), cache_format=cache_format)
+    first = store.load("f.csv", **kwargs)
+    second = store.load("f.csv", **kwargs)
+    third = FeatureStore(str(tmp_path), cache_format=cache_format).load("f.csv", **kwargs)
+    pd.testing.assert_frame_equal(first, second)
+    pd.testing.assert_frame_equal(first, third)
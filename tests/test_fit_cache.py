@@ -0,0 +1,65 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fit_cache import FitCache
+from mixedlm_helpers import fit_mixedlm
+
+FORMULA = "y ~ x"
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({"ID": np.repeat(np.arange(12), 15), "x": rng.normal(size=180),
+                       "unused": rng.normal(size=180)})
+    df["y"] = df["x"] + rng.normal(size=12)[df["ID"]] + rng.normal(size=180)
+    return df
+
+
+def _fit(df, cache, **kw):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return fit_mixedlm(FORMULA, df, "ID", method="bfgs", cache=cache, **kw)
+
+
+def test_memory_tier(data):
+    cache = FitCache()
+    first = _fit(data, cache)
+    assert _fit(data, cache) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_disk_tier(data, tmp_path):
+    first = _fit(data, FitCache(cache_dir=str(tmp_path)))
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+    cache = FitCache(cache_dir=str(tmp_path))         # empty memory tier
+    again = _fit(data, cache)
+    assert (cache.hits, cache.misses) == (1, 0)
+    pd.testing.assert_series_equal(again.params, first.params)
+
+
+def test_key_changes_with_used_data_only(data):
+    cache = FitCache()
+    first = _fit(data, cache)
+    other = data.copy()
+    other["unused"] += 1.0
+    assert _fit(other, cache) is first
+    other.loc[0, "x"] += 1.0
+    changed = _fit(other, cache)
+    assert changed is not first and cache.misses == 2
+    assert not np.allclose(changed.params, first.params)
+
+
+def test_key_includes_start_params_and_design(data):
+    from design_cache import DesignCache
+
+    cache = FitCache()
+    plain = _fit(data, cache)
+    warm = _fit(data, cache, start_params=[0.5])
+    shared = _fit(data, cache, design=DesignCache())
+    assert warm is not plain and shared is not plain and shared is not warm
+    assert _fit(data, cache, start_params=np.array([0.5])) is warm
+    assert cache.misses == 3
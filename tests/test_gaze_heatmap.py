@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from gaze_heatmap import _blink_mask, compute_gaze_heatmaps, heatmap_frame
+
+
+def _trial(x, y):
+    return np.stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)])[None]
+
+
+def test_edges_and_histcounts_bins():
+    # left-closed bins, the right screen edge falls in the last bin
+    data = _trial([0, 199, 200, 800, 400], [0, 150, 150, 600, 300])
+    hm = compute_gaze_heatmaps(data, num_bins=5, smoothing_factor=0, blink_y=(-1, 601))
+    np.testing.assert_array_equal(hm.x_edges, [0, 200, 400, 600, 800])
+    np.testing.assert_array_equal(hm.y_edges, [0, 150, 300, 450, 600])
+    expected = np.zeros((4, 4))
+    expected[0, 0] = 1          # (0, 0)
+    expected[1, 0] = 1          # (199, 150)
+    expected[1, 1] = 1          # (200, 150)
+    expected[3, 3] = 1          # (800, 600)
+    expected[2, 2] = 1          # (400, 300)
+    assert hm.n_valid.tolist() == [5]
+    np.testing.assert_allclose(hm.maps[0], expected / 5)
+
+
+def test_blink_window_counts_on_screen_samples_only():
+    # 10 Hz, 0.2 s window = 2 samples; sample 3 is off screen, sample 5 is a blink
+    x = np.full(10, 400.0)
+    y = np.full(10, 300.0)
+    x[3] = -1
+    y[5] = 50
+    valid = np.ones((1, 10), dtype=bool)
+    valid[0, 3] = False
+    blink = np.zeros((1, 10), dtype=bool)
+    blink[0, 5] = True
+    removed = _blink_mask(valid, blink, 2)
+    # compacted positions 2..6 around the blink at position 4 -> samples 2, 4, 5, 6, 7
+    assert np.flatnonzero(removed[0]).tolist() == [2, 4, 5, 6, 7]
+
+    hm = compute_gaze_heatmaps(_trial(x, y), num_bins=3, smoothing_factor=0, fs=10.0,
+                               blink_window=0.2)
+    assert hm.n_valid.tolist() == [9]                   # denominator keeps blink samples
+    assert hm.maps.sum() == pytest.approx(4 / 9)        # samples 0, 1, 8, 9 remain
+    assert hm.maps[0, 1, 1] == pytest.approx(4 / 9)
+
+
+def test_default_blink_range_and_nan_samples():
+    data = _trial([100, 100, np.nan, 100], [99, 100, 300, 500])
+    hm = compute_gaze_heatmaps(data, num_bins=2, smoothing_factor=0, blink_window=0)
+    assert hm.n_valid.tolist() == [3]                   # NaN sample is off screen
+    assert hm.maps[0, 0, 0] == pytest.approx(2 / 3)     # y = 99 is a blink, 100 and 500 are not
+
+
+def test_gaussian_smoothing_kernel():
+    # one sample in the centre bin of a 5 x 5 grid, sigma = 1 bin: radius ceil(2σ) = 2
+    data = _trial([400], [300])
+    hm = compute_gaze_heatmaps(data, num_bins=6, smoothing_factor=1.0, blink_y=(-1, 601))
+    k = np.exp(-0.5 * np.arange(-2, 3) ** 2)
+    k /= k.sum()
+    np.testing.assert_allclose(hm.maps[0], np.outer(k, k), rtol=1e-6)
+    assert hm.maps.dtype == np.float32
+
+
+def test_chunks_and_frame():
+    rng = np.random.default_rng(1)
+    data = np.stack([rng.uniform(0, 800, (7, 200)), rng.uniform(0, 600, (7, 200))], axis=1)
+    whole = compute_gaze_heatmaps(data, num_bins=9, smoothing_factor=1.5)
+    chunked = compute_gaze_heatmaps(data, num_bins=9, smoothing_factor=1.5, chunk_trials=3)
+    np.testing.assert_array_equal(whole.maps, chunked.maps)
+    df = heatmap_frame(whole)
+    assert len(df) == 7 * 8 * 8
+    row = df.iloc[8 * 3 + 5]                            # trial 0, ybin 3, xbin 5
+    assert (row["ybin"], row["xbin"]) == (3, 5)
+    assert row["x"] == pytest.approx(550.0) and row["y"] == pytest.approx(262.5)
+    assert row["value"] == whole.maps[0, 3, 5]
@@ -0,0 +1,57 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mixedlm_helpers import fit_mixedlm
+
+FORMULA = "y ~ x * C(Condition)"
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(5)
+    n_id, n_trials = 30, 25
+    df = pd.DataFrame({
+        "ID": np.repeat([f"S{i:02d}" for i in range(n_id)], n_trials),
+        "Condition": np.tile(["a", "b", "c", "d", "e"], n_id * n_trials // 5),
+        "x": rng.normal(size=n_id * n_trials),
+    })
+    u = 0.8 * rng.normal(size=n_id)[np.repeat(np.arange(n_id), n_trials)]
+    df["y"] = 0.5 * df["x"] + 0.3 * (df["Condition"] == "b") + u + rng.normal(size=len(df))
+    df.loc[rng.choice(len(df), 20, replace=False), "y"] = np.nan
+    return df
+
+
+def _fit(*args, **kw):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return fit_mixedlm(*args, **kw)
+
+
+@pytest.mark.parametrize("reml", [False, True])
+def test_matches_statsmodels(data, reml):
+    fast = _fit(FORMULA, data, "ID", reml=reml, solver="fast")
+    ref = _fit(FORMULA, data, "ID", reml=reml, method="bfgs")
+    assert fast.nobs == ref.nobs == data["y"].notna().sum()
+    assert list(fast.params.index) == list(ref.params.index)
+    np.testing.assert_allclose(fast.params, ref.params, atol=1e-4)
+    np.testing.assert_allclose(fast.bse, ref.bse, rtol=1e-3)
+    # the profiled 1-D optimum is at least as good as statsmodels' BFGS optimum
+    assert fast.llf == pytest.approx(ref.llf, abs=1e-6)
+    assert fast.llf >= ref.llf - 1e-9
+    np.testing.assert_allclose(np.asarray(fast.cov_re), np.asarray(ref.cov_re), rtol=1e-3)
+
+
+def test_incremental_update_equals_refit(data):
+    old = data[data["ID"] < "S20"]
+    new = data[data["ID"] >= "S20"]
+    previous = _fit(FORMULA, old, "ID", solver="fast")
+    updated = _fit(FORMULA, new, "ID", solver="fast", previous=previous)
+    refit = _fit(FORMULA, data, "ID", solver="fast")
+    assert updated.nobs == refit.nobs
+    np.testing.assert_allclose(updated.params, refit.params, rtol=1e-6, atol=1e-7)
+    np.testing.assert_allclose(updated.bse, refit.bse, rtol=1e-6)
+    assert updated.llf == pytest.approx(refit.llf, abs=1e-8)
+
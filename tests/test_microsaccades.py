@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from microsaccades import _runs, detect_microsaccades, eye_velocity
+
+
+def test_eye_velocity_kernel_and_localmean_padding():
+    # fs = 6 makes the kernel scale 1; a unit ramp has velocity 6 away from the edges
+    v = eye_velocity(np.arange(10.0)[None, None], fs=6.0)
+    np.testing.assert_allclose(v[0, 0], [1, 4, 6, 6, 6, 6, 6, 6, 4, 1])
+
+
+def test_runs():
+    mask = np.array([[1, 1, 1, 0, 1, 1, 0, 1, 1, 1],
+                     [0, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                     [1, 1, 1, 1, 1, 1, 1, 1, 1, 1]], dtype=bool)
+    trial, onset, offset = _runs(mask, 3)
+    assert trial.tolist() == [0, 0, 2]
+    assert onset.tolist() == [0, 7, 0]
+    assert offset.tolist() == [2, 9, 9]
+
+
+@pytest.fixture
+def gaze():
+    # 500 Hz, 1 s trials of fixation noise; trial 0 has a 20-sample ramp of 1 px/sample
+    # (x rises over samples 101..120) and a 2-sample blip too short to count
+    rng = np.random.default_rng(3)
+    data = 0.01 * rng.standard_normal((3, 2, 500))
+    data[0, 0, 101:121] += np.arange(1, 21)
+    data[0, 0, 121:] += 20
+    data[0, 1, 301:303] += [1, 2]
+    data[0, 1, 303:] += 2
+    data[2] = np.nan
+    return data
+
+
+def test_detection(gaze):
+    ms = detect_microsaccades(gaze, fs=500.0)
+    ev = ms.events
+    # the ramp moves the kernel velocity on samples 99..121 (fs/6 = 83 px/s at the edges,
+    # 250 px/s next to them, far above the ~7 px/s threshold); the blip covers 5 samples
+    assert ev["trial"].tolist() == [0]
+    assert ev["onset"].tolist() == [99]
+    assert ev["offset"].tolist() == [121]
+    assert ev["duration"].tolist() == [23]
+    assert ev["peak"].tolist() == [110]         # MATLAB: 100 + round(23 / 2) - 1 = 111, 1-based
+    np.testing.assert_allclose(ms.rates, [1.0, 0.0, 0.0])
+
+    vel = eye_velocity(gaze[1], 500.0)
+    expected = 6.0 * np.sqrt(np.median(vel ** 2, axis=-1) - np.median(vel, axis=-1) ** 2)
+    np.testing.assert_allclose(ms.radius[1], expected)
+    assert np.all((ms.radius[:2] > 5) & (ms.radius[:2] < 10))
+    assert np.isnan(ms.radius[2]).all()
+
+
+def test_threshold_and_options(gaze):
+    base = detect_microsaccades(gaze, fs=500.0)
+    strict = detect_microsaccades(gaze, fs=500.0, velthres=100.0)
+    np.testing.assert_allclose(strict.radius, base.radius * 100 / 6)
+    assert strict.events["onset"].tolist() == [100]     # radius > 83 px/s: the edge samples drop out
+    assert strict.events["offset"].tolist() == [120]
+    short = detect_microsaccades(gaze, fs=500.0, mindur=5)
+    assert short.events[["trial", "onset", "duration"]].values.tolist() == [[0, 99, 23], [0, 299, 5]]
+    chunked = detect_microsaccades(gaze, fs=500.0, chunk_trials=1, trl_length=[250, 500, 500])
+    assert chunked.events.equals(base.events)
+    np.testing.assert_allclose(chunked.rates, [2.0, 0.0, 0.0])
@@ -0,0 +1,46 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from design_cache import DesignCache
+from mixedlm_helpers import fit_mixedlm, fit_mixedlm_multi
+
+DVS = ["b0", "b1", "b2"]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(2)
+    n_id, n_trials = 20, 40
+    df = pd.DataFrame({
+        "ID": np.repeat([f"S{i:02d}" for i in range(n_id)], n_trials),
+        "Condition": np.tile(["L2", "L4", "L6", "L8"], n_id * n_trials // 4),
+        "z": rng.normal(size=n_id * n_trials),
+    })
+    u = rng.normal(size=n_id)[np.repeat(np.arange(n_id), n_trials)]
+    for k, dv in enumerate(DVS):
+        df[dv] = (k + 1) * 0.2 * df["Condition"].str[1:].astype(float) + u + rng.normal(size=len(df))
+        df.loc[rng.choice(len(df), 30 * k, replace=False), dv] = np.nan     # per-DV missing values
+    df.loc[rng.choice(len(df), 100, replace=False), "z"] = np.nan          # only in the larger model
+    return df
+
+
+@pytest.mark.parametrize("solver", ["fast", "statsmodels"])
+@pytest.mark.parametrize("warm", [False, True])
+def test_multi_equals_separate_fits(data, solver, warm):
+    rhs = "C(Condition)"
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        cache = DesignCache()
+        if warm:      # the cache already holds a design of a superset of the terms
+            fit_mixedlm(f"b0 ~ z + {rhs}", data, "ID", solver=solver, method="bfgs", design=cache)
+        table, summaries = fit_mixedlm_multi(DVS, rhs, data, "ID", solver=solver, method="bfgs",
+                                             summaries=True, design=cache)
+        separate = [fit_mixedlm(f"{dv} ~ {rhs}", data, "ID", solver=solver, method="bfgs") for dv in DVS]
+    for dv, s, res in zip(DVS, summaries, separate):
+        assert s.nobs == res.nobs == data[dv].notna().sum()
+        np.testing.assert_allclose(s.params.to_numpy(), np.asarray(res.params), rtol=1e-4, atol=1e-6)
+        np.testing.assert_allclose(s.llf, res.llf, rtol=1e-9)
+        assert (table.loc[table["DV"] == dv, "n_obs"] == res.nobs).all()
@@ -0,0 +1,20 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from rainclouds_plotting_helpers import add_stat_brackets  # noqa: E402
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_integer_levels_from_contrasts_table(batched):
+    fig, ax = plt.subplots()
+    ax.set_xticks([0, 1, 2])
+    ax.set_xticklabels(["2", "4", "6"])
+    table = pd.DataFrame({"group1": [2, 2, 4], "group2": [4, 6, 6], "p_adj": [0.01, 0.2, 0.0004]})
+    add_stat_brackets(ax, [2, 4, 6], table, batched=batched)
+    assert [t.get_text() for t in ax.texts] == ["*", "n.s.", "***"]
+    plt.close(fig)